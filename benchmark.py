@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+compares the engines (bentley ottmann, uniform grid, parallel bentley ottmann and naive algorithm)
+on given .bo files : prints the best runtime of each engine and
+the number of unique intersections it found.
+with -w, runs the engines on generated workloads of growing sizes instead (see workloads.py)
+and writes the measures as json :
+    - wall time of the engine (loading excluded) and events processed per second
+      (events are sweep events for bentley ottmann, of all the slabs for parallel bentley ottmann,
+      cells for the grid, tiles for naive)
+    - peak memory (resident set size) of the process, plus the peaks of its worker processes
+      for parallel bentley ottmann (an upper bound : they may not peak at the same time)
+    - number of unique intersections found
+each measure runs in a new process. once an engine goes over the timeout on a workload,
+larger sizes of this workload are skipped for this engine.
+with --startup, measures the time bo.py --no-compare takes on small files instead, loading included,
+and fails if it goes over --startup-budget : the imports must stay out of the way of short runs.
+with --check, compares the pairs of segments each engine finds crossing on generated workloads
+with the ones of naive, and fails if an engine misses or adds one (parallel runs on CHECK_SLABS slabs).
+the hand-written CHECK_CASES and small seeded sets of segments with integer coordinates
+(--fuzz of them, see workloads.small_integers) are checked too : the generated workloads hardly ever
+put an endpoint on another segment.
+pairs are compared, not points : the engines snap the crossings in different orders,
+their points (and numbers of unique intersections) may differ by less than a snapping step.
+"""
+
+import argparse
+import json
+import sys
+from contextlib import redirect_stdout
+from io import StringIO
+from multiprocessing import get_context
+from os.path import join, dirname, abspath
+from platform import python_version
+from resource import getrusage, RUSAGE_SELF, RUSAGE_CHILDREN
+from subprocess import run, PIPE, SubprocessError
+from tempfile import TemporaryDirectory
+from time import time, strftime
+import numpy as np
+from geo.segment import load_segments, save_coordinates
+from workloads import WORKLOADS, generate, small_integers
+from bo import bentley_ottmann
+from grid import grid
+from naive import naive
+from parallel import parallel_bentley_ottmann
+
+ENGINES = {'bo': bentley_ottmann, 'grid': grid, 'parallel': parallel_bentley_ottmann, 'naive': naive}
+SIZES = [10**2, 10**3, 10**4, 10**5, 10**6]
+CHECK_SIZES = [300, 2000] # naive runs on each workload : sizes of --check
+CHECK_SLABS = 4           # slabs of parallel with --check, so that the merge of slabs is checked on one processor too
+CHECK_FUZZ = 1000         # small sets of segments with integer coordinates checked with --check
+FUZZ_SIZES = (2, 40)      # bounds of their numbers of segments
+# sets of segments checked with --check : segments 0 and 3 cross where 1 ends and 4 starts, 1 lying between them
+CHECK_CASES = {'t_junction': [[1, 1, 5, 5], [4, 0, 2, 2], [2, 4, 1, 0], [0, 3, 4, 1], [0, 4, 2, 2]]}
+STARTUP_FILE = join(dirname(abspath(__file__)), 'tests', 'simple.bo')
+
+
+def benchmark(filepath, engine, repeat):
+    """
+    best runtime of an engine on a file, and intersections found
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        adjuster, segments = load_segments(filepath)
+        with redirect_stdout(StringIO()): # no progress bar
+            start = time()
+            results, _ = ENGINES[engine](adjuster, segments)
+            best = min(best, time() - start)
+    return best, results.unique_count()
+
+
+def measure(filepath, engine, connection):
+    """
+    runs an engine on a file (in a new process) and sends its measures through connection
+    """
+    adjuster, segments = load_segments(filepath)
+    with redirect_stdout(StringIO()): # no progress bar
+        start = time()
+        results, timeline = ENGINES[engine](adjuster, segments)
+        wall_time = time() - start
+    connection.send({'segments': len(segments), 'wall_time': wall_time, 'events': timeline.records,
+                     'events_per_second': timeline.records / wall_time if wall_time else None,
+                     'peak_memory': getrusage(RUSAGE_SELF).ru_maxrss * 1024 + timeline.workers_memory, # kilobytes on linux
+                     'intersections': results.unique_count()})
+
+
+def measure_in_process(filepath, engine, timeout):
+    """
+    measures of an engine on a file, none if it did not finish before timeout (in seconds)
+    """
+    context = get_context('spawn') # a fresh process : memory peaks do not add up
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=measure, args=(filepath, engine, sender))
+    process.start()
+    measures = receiver.recv() if receiver.poll(timeout) else None
+    if measures is None:
+        process.terminate()
+    process.join()
+    return measures
+
+
+def startup(filepath, repeat):
+    """
+    best wall time of bo.py --no-compare on a file, each run in a new interpreter,
+    and peak memory (resident set size) of these runs
+    """
+    command = [sys.executable, join(dirname(abspath(__file__)), 'bo.py'), '--no-compare', '--report', 'none', filepath]
+    best = float('inf')
+    for _ in range(repeat):
+        start = time()
+        run(command, stdout=PIPE, stderr=PIPE, check=True)
+        best = min(best, time() - start)
+    return best, getrusage(RUSAGE_CHILDREN).ru_maxrss * 1024 # kilobytes on linux
+
+
+def suite(workloads, sizes, engines, repeat, timeout, directory):
+    """
+    measures of each engine on each workload of each size, as a list of records.
+    the best wall time out of repeat runs is kept.
+    """
+    records = []
+    for workload in workloads:
+        timed_out = set()
+        for size in sorted(sizes):
+            filepath = join(directory, "{}_{}.bo".format(workload, size))
+            generate(workload, size, filepath)
+            for engine in engines:
+                record = {'workload': workload, 'n': size, 'engine': engine}
+                if engine in timed_out:
+                    record['status'] = 'skipped'
+                else:
+                    runs = [measure_in_process(filepath, engine, timeout) for _ in range(repeat)]
+                    if None in runs:
+                        timed_out.add(engine)
+                        record['status'] = 'timeout'
+                    else:
+                        record['status'] = 'ok'
+                        record.update(min(runs, key=lambda measures: measures['wall_time']))
+                records.append(record)
+                print("{:<16}{:>8}{:>10}{:>10}{:>14}".format(workload, size, engine, record['status'],
+                                                              record.get('intersections', '')), file=sys.stderr)
+    return records
+
+
+def pairs_found(filepath, engine):
+    """
+    pairs of segments (smallest first) an engine finds crossing in a file
+    """
+    adjuster, segments = load_segments(filepath)
+    options = {'slabs': CHECK_SLABS} if engine == 'parallel' else {}
+    with redirect_stdout(StringIO()): # no progress bar
+        results, _ = ENGINES[engine](adjuster, segments, **options)
+    segments_1, segments_2, _, _ = results.stored_columns()
+    return set(zip(segments_1.tolist(), segments_2.tolist()))
+
+
+def check_file(filepath, engines):
+    """
+    pairs found, missing and extra pairs of each engine on a file, compared with the ones of naive
+    """
+    expected = pairs_found(filepath, 'naive')
+    for engine in engines:
+        found = pairs_found(filepath, engine) if engine != 'naive' else expected
+        yield engine, {'pairs': len(found), 'expected': len(expected), 'missing': len(expected - found), 'extra': len(found - expected)}
+
+
+def check(workloads, sizes, engines, directory, fuzz=CHECK_FUZZ):
+    """
+    compares the pairs found by the engines with the ones of naive on each workload of each size,
+    on each of the CHECK_CASES, and on fuzz small sets of segments with integer coordinates
+    (their counts are summed up in a record per engine, n being the number of sets).
+    returns the list of records : pairs found, missing and extra pairs of each engine
+    """
+    records = []
+    for workload in workloads:
+        for size in sorted(sizes):
+            filepath = join(directory, "{}_{}.bo".format(workload, size))
+            generate(workload, size, filepath)
+            for engine, counts in check_file(filepath, engines):
+                records.append({'workload': workload, 'n': size, 'engine': engine, **counts})
+
+    for name, coordinates in CHECK_CASES.items():
+        filepath = join(directory, "{}.bo".format(name))
+        save_coordinates(filepath, coordinates)
+        for engine, counts in check_file(filepath, engines):
+            records.append({'workload': name, 'n': len(coordinates), 'engine': engine, **counts})
+
+    if fuzz:
+        fuzzed = {engine: {'workload': 'small_integers', 'n': fuzz, 'engine': engine, 'pairs': 0, 'expected': 0, 'missing': 0, 'extra': 0}
+                  for engine in engines}
+        filepath = join(directory, "small_integers.bo")
+        for seed, size in enumerate(np.random.default_rng(0).integers(*FUZZ_SIZES, fuzz).tolist()):
+            save_coordinates(filepath, small_integers(size, seed))
+            for engine, counts in check_file(filepath, engines):
+                for field, count in counts.items():
+                    fuzzed[engine][field] += count
+        records.extend(fuzzed.values())
+    return records
+
+
+def commit():
+    """
+    current git commit of the sources, if any
+    """
+    try:
+        return run(['git', 'rev-parse', 'HEAD'], cwd=dirname(abspath(__file__)), stdout=PIPE, stderr=PIPE,
+                   check=True, universal_newlines=True).stdout.strip()
+    except (OSError, SubprocessError):
+        return None
+
+
+def main():
+    """
+    benchmark each engine on each file, or on generated workloads.
+    """
+    parser = argparse.ArgumentParser(description='Compare the engines finding crossings in a set of line segments.')
+    parser.add_argument('-e', dest='engines', nargs='+', choices=list(ENGINES), help='engines to compare', default=list(ENGINES))
+    parser.add_argument('-r', dest='repeat', type=int, help='number of runs, the best one is kept', default=3)
+    parser.add_argument('-w', dest='workloads', nargs='+', choices=list(WORKLOADS), help='run on generated workloads instead of files')
+    parser.add_argument('-n', dest='sizes', nargs='+', type=int, help='numbers of segments of the generated workloads (10**2 to 10**6, 300 and 2000 with --check)', default=None)
+    parser.add_argument('--timeout', type=float, help='time limit of a run on a workload, in seconds', default=600)
+    parser.add_argument('-d', dest='directory', help='directory where the workloads are generated (temporary if not given)')
+    parser.add_argument('-o', dest='output', help='json file where the measures are written (standard output if not given)')
+    parser.add_argument('--startup', action='store_true', help='measure the startup of bo.py --no-compare on the files (tests/simple.bo if none is given)', default=False)
+    parser.add_argument('--startup-budget', dest='startup_budget', type=float, help='with --startup, fail if a file takes longer than this many seconds', default=None)
+    parser.add_argument('--check', action='store_true', help='compare the pairs found by the engines with the ones of naive on generated workloads (-w, all of them by default), fail if one differs', default=False)
+    parser.add_argument('--fuzz', type=int, help='with --check, number of small sets of segments with integer coordinates checked too', default=CHECK_FUZZ)
+    parser.add_argument(dest='filepaths', nargs='*', help='filepaths of the .bo files to analyse')
+    arguments = parser.parse_args()
+
+    if arguments.check:
+        print("{:<16}{:>8}{:>10}{:>10}{:>10}{:>10}{:>10}".format("Workload", "Size", "Engine", "Pairs", "Naive", "Missing", "Extra"))
+        with TemporaryDirectory() as temporary_directory:
+            records = check(arguments.workloads or list(WORKLOADS), arguments.sizes or CHECK_SIZES, arguments.engines,
+                            arguments.directory or temporary_directory, arguments.fuzz)
+        for record in records:
+            print("{workload:<16}{n:>8}{engine:>10}{pairs:>10}{expected:>10}{missing:>10}{extra:>10}".format(**record))
+        different = sum(bool(record['missing'] or record['extra']) for record in records)
+        if different:
+            sys.exit("{} runs differ from naive".format(different))
+        return
+
+    if arguments.startup:
+        print("{:<24}{:>14}{:>18}".format("File", "Startup (s)", "Peak memory (MB)"))
+        over_budget = False
+        for filepath in arguments.filepaths or [STARTUP_FILE]:
+            runtime, peak_memory = startup(filepath, arguments.repeat)
+            print("{:<24}{:>14.4f}{:>18.1f}".format(filepath.split('/')[-1], runtime, peak_memory / 2**20))
+            if arguments.startup_budget is not None and runtime > arguments.startup_budget:
+                over_budget = True
+        if over_budget:
+            sys.exit("startup over the budget of {}s".format(arguments.startup_budget))
+        return
+
+    if arguments.workloads:
+        with TemporaryDirectory() as temporary_directory:
+            records = suite(arguments.workloads, arguments.sizes or SIZES, arguments.engines, arguments.repeat,
+                            arguments.timeout, arguments.directory or temporary_directory)
+        report = {'commit': commit(), 'python': python_version(), 'date': strftime('%Y-%m-%dT%H:%M:%S'),
+                  'timeout': arguments.timeout, 'results': records}
+        if arguments.output:
+            with open(arguments.output, 'w') as file:
+                json.dump(report, file, indent=1)
+        else:
+            json.dump(report, sys.stdout, indent=1)
+        return
+
+    if not arguments.filepaths:
+        parser.error('filepaths are required without -w')
+    print("{:<24}{:>8}{:>8}{:>14}{:>14}".format("File", "Engine", "Size", "Runtime (s)", "Intersections"))
+    for filepath in arguments.filepaths:
+        size = len(load_segments(filepath)[1])
+        for engine in arguments.engines:
+            runtime, intersections = benchmark(filepath, engine, arguments.repeat)
+            print("{:<24}{:>8}{:>8}{:>14.4f}{:>14}".format(filepath.split('/')[-1], engine, size, runtime, intersections))
+
+if __name__ == "__main__":
+    main()
@@ -9,114 +9,391 @@ for each file:
     - run bentley ottmann
     - display results
     - print some statistics
+the naive comparison, the plots and the figures are only imported when they are asked for :
+bo.py --no-compare starts quickly, to run the sweep alone on many small files.
 """
 
 
-from time import time
-from os.path import isfile, exists
+from os.path import isfile, exists, splitext, basename
 from os import makedirs
-import re
-import matplotlib.pyplot as plt
-from naive import naive
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout, nullcontext
+from io import StringIO
+from itertools import combinations
+from math import hypot
+from time import perf_counter
+import sys
+from grid import grid
+from parallel import parallel_bentley_ottmann
 from geo.segment import load_segments
-from geo.save_svg import save_svg
-from geo.tycat import tycat
-from events import Events
-from helpers import living_key, nearest_living, find_new_event, get_entries, progress_bar
+from checkpoint import SweepState, Checkpoint
+from crossings import CrossingsWriter
+from helpers import living_key, find_crossing, find_new_event, get_entries
+from metrics import Metrics, metrics_for
+from profiler import Profiler, hot_functions
 
 
 
-def bentley_ottmann(adjuster, segments):
+def iter_intersections(adjuster, segments, since=None, until=None, state=None, checkpoint=None, metrics=None, profiler=None):
     """
-    implementation of the Bentley Ottmann algorithm
+    Bentley Ottmann sweep yielding each crossing (segment_a, segment_b, point) once
+    as soon as the sweep line reaches it, point being a (x, y) tuple.
+    the consumer can stop early : memory used only depends on the sweep state.
+    - segments = SegmentStore, segments are handled through their indices
+    - since, until = if given, the sweep starts at height since and stops after the events at height until
+    - state = if given, the SweepState to go on from (adjuster, since and until are then the state's ones)
+    - checkpoint = if given, the Checkpoint saving the state between two events
+    - metrics = if given, the Metrics counting and reporting what the sweep does
+    - profiler = if given, the Profiler timing each phase of the sweep
+      (the time the consumer takes for a crossing goes to the phase yielding it)
     """
 
-    events = Events(segments)
-    living = []
-    results = {}
-
-    graph = [[0], [0]] # This will be useful to observe the time complexity
-    start = time()
-    finished = len(events.heap) # This will be useful to print a progress bar in the console
-
-    while events.heap and time() - start < 1200:
-
-        current_point, intersection, lower, upper, horizontal = events.pop_event()
-        """
-        - lower = [segments that have the current_point as a lower endpoint]
-        - upper = [segments that have the current_point as an upper endpoint]
-        - intersection [segments that strike through the current_point but where
-          the current_point is not an endpoint of the said segments]
-        - horizontal = [horizontal segments that have the current_point as an endpoint]
-        """
-
-        for segment in horizontal:
-            for other_segment in living:
-                find_new_event(segment, other_segment, current_point, events, results, adjuster)
-
-        for segment in upper:
-            left_segment, right_segment = nearest_living(segment, living)
-            find_new_event(left_segment, right_segment, current_point, events, results, adjuster)
-            living.remove(segment)
-
-
-        for segment in lower:
-            living.append(segment)
-            living.sort(key=lambda segment: living_key(segment, current_point, adjuster))
-            left_segment, right_segment = nearest_living(segment, living)
-            find_new_event(segment, right_segment, current_point, events, results, adjuster)
-            find_new_event(left_segment, segment, current_point, events, results, adjuster)
+    if state is None:
+        state = SweepState(adjuster, segments, since, until)
+    adjuster, events, living, cache, reported, until = state.adjuster, state.events, state.living, state.cache, state.reported, state.until
+    if metrics is None:
+        metrics = Metrics()
+    metrics.watch(events, living, cache)
+    timed = profiler is not None
+
+    try:
+        while events and (until is None or events.next_point()[1] <= until):
+            if checkpoint is not None and checkpoint.over_budget():
+                checkpoint.save(state)
+                checkpoint.interrupted = True
+                break
+
+            if timed:
+                clock = perf_counter()
+            current_point, intersection, lower, upper, horizontal = events.pop_event()
+            """
+            - lower = [segments that have the current_point as a lower endpoint]
+            - upper = [segments that have the current_point as an upper endpoint]
+            - intersection [segments that strike through the current_point but where
+              the current_point is not an endpoint of the said segments], by pairs
+            - horizontal = [horizontal segments that have the current_point as an endpoint]
+            """
+
+            # every two living segments striking through current_point cross there, scheduled or not
+            # (only neighbours are scheduled, a pair may have been scheduled several times,
+            # or at another point it was snapped to, or not at all when the point is an endpoint
+            # of segments between them). aligned segments have no crossing
+            inverse_slopes = segments.columns[4]
+            scheduled = [segment for segment in dict.fromkeys(intersection) if segment in living]
+            crossing, near = passing_through(segments, living, scheduled, current_point, adjuster, upper)
+            for segment_1, segment_2 in combinations(crossing, 2):
+                if inverse_slopes[segment_1] != inverse_slopes[segment_2] and (segment_1, segment_2) not in reported \
+                        and (segment_1 not in near and segment_2 not in near or cache.crossing(segments, segment_1, segment_2, adjuster) is not None):
+                    reported.report(segment_1, segment_2)
+                    metrics.intersections += 1
+                    yield segment_1, segment_2, current_point
+            if timed:
+                clock = profiler.lap('sweep : pop and intersections', clock)
+
+            # only the living segments crossing the sweep line within an horizontal segment can cross it
+            for segment in horizontal:
+                lower_x, upper_x = segments.lower(segment)[0], segments.upper(segment)[0]
+                for other_segment in living.between(lower_x, upper_x, lambda other_segment: segments.x_at(other_segment, current_point[1])):
+                    metrics.intersection_tests += 1
+                    new_intersection = find_crossing(segments, segment, other_segment, adjuster)
+                    if new_intersection is not None:
+                        state.processed += 1
+                        metrics.intersections += 1
+                        yield segment, other_segment, new_intersection
+            if timed:
+                clock = profiler.lap('sweep : horizontal', clock)
+
+            # crossings of the ending segments still to come were snapped after their upper endpoint :
+            # they are handled before the segments leave
+            late = [] # crossings still to come, but snapped at or before current_point
+            ending = set(upper)
+            metrics.intersection_tests += 2 * len(upper)
+            for segment in upper:
+                left_segment, right_segment = living.neighbours(segment)
+                find_new_event(segments, left_segment, segment, current_point, events, adjuster, cache, late, reported, ending)
+                find_new_event(segments, segment, right_segment, current_point, events, adjuster, cache, late, reported, ending)
+            yield from late_crossings(segments, living, reported, late, current_point, events, adjuster, cache, state, metrics, ending)
+
+            metrics.intersection_tests += len(upper)
+            for segment in upper:
+                left_segment, right_segment = living.neighbours(segment)
+                find_new_event(segments, left_segment, right_segment, current_point, events, adjuster, cache, late, reported)
+                living.remove(segment)
+                cache.evict(segment)
+                reported.evict(segment)
+            if timed:
+                clock = profiler.lap('sweep : upper', clock)
+
+            # segments crossing at current_point exchange their order on the sweep line, before the segments
+            # starting there are inserted among them : all of them are sorted at once, by inverse slopes
+            # (the late swaps come after the insertions, the order must already be right at current_point)
+            if len(crossing) == 2 and not lower and crossing[1] in living.neighbours(crossing[0]):
+                living.swap(*crossing)
+            else:
+                for segment in crossing:
+                    living.remove(segment)
+                through = set(lower + crossing)
+                for segment in lower + crossing:
+                    living.insert(segment, lambda segment: living_key(segments, segment, current_point, through))
+            if timed:
+                clock = profiler.lap('sweep : crossing and lower', clock)
+
+            metrics.intersection_tests += 2 * (len(lower) + len(crossing))
+            for segment in lower + crossing:
+                left_segment, right_segment = living.neighbours(segment)
+                find_new_event(segments, segment, right_segment, current_point, events, adjuster, cache, late, reported)
+                find_new_event(segments, left_segment, segment, current_point, events, adjuster, cache, late, reported)
+            if timed:
+                clock = profiler.lap('sweep : new neighbours', clock)
+
+            yield from late_crossings(segments, living, reported, late, current_point, events, adjuster, cache, state, metrics)
+            if timed:
+                clock = profiler.lap('sweep : late crossings', clock)
+
+            if intersection:
+                state.processed += 1
+            state.timeline.record(state.processed)
+            metrics.event(len(living))
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save(state)
+            if timed:
+                profiler.lap('sweep : bookkeeping', clock)
+    finally:
+        state.timeline.close(state.processed)
+        metrics.close()
+
+
+def passing_through(segments, living, scheduled, current_point, adjuster, upper):
+    """
+    the living segments striking through current_point (but not ending there) the sweep line must handle at once,
+    whether the point is an intersection event or only an endpoint of other segments :
+    the scheduled ones, the ones crossing the sweep line within two snapping steps of it (found on the sweep line
+    around its x coordinate), and their living neighbours (from one to the next) passing within two snapping steps of it.
+    only neighbours are scheduled : segments crossing within rounding errors of each other (a pencil of segments)
+    are not in order on the sweep line, and would else miss the event.
+    returns them sorted, and the set of the ones which were not scheduled (they may only pass near current_point)
+    """
+    width = 2 / adjuster.scale
+    x_coordinate, y_coordinate = current_point
+    inverse_slopes = segments.columns[4]
+    ending = set(upper)
+    through = set(scheduled)
+    through.update(segment for segment in living.between(x_coordinate - width, x_coordinate + width, lambda segment: segments.x_at(segment, y_coordinate))
+                   if segment not in ending)
+    for segment in list(through) + upper:
+        for side in (0, 1):
+            neighbour = living.neighbours(segment)[side]
+            while neighbour is not None and neighbour not in through and neighbour not in ending \
+                    and abs(segments.x_at(neighbour, y_coordinate) - x_coordinate) <= width * hypot(1, inverse_slopes[neighbour]):
+                through.add(neighbour)
+                neighbour = living.neighbours(neighbour)[side]
+    return sorted(through), through.difference(scheduled)
+
+
+def late_crossings(segments, living, reported, late, current_point, events, adjuster, cache, state, metrics, ending=()):
+    """
+    handles at current_point the late crossings (see find_new_event) : each pair of neighbours
+    is yielded and swapped at once, then its new neighbours are tested, until no crossing is late.
+    a pair is only handled once, so that it cannot be swapped back and forth.
+    missed crossings are only yielded (their segments are already in order), if they are not below the start of the sweep.
+    - late = list of (left segment, right segment, point, still to come), emptied
+    - ending = segments leaving the sweep line at current_point
+    """
+    while late:
+        segment_1, segment_2, point, to_come = late.pop()
+        if not to_come:
+            if (state.since is None or point[1] >= state.since) and reported.report(segment_1, segment_2):
+                state.processed += 1
+                metrics.intersections += 1
+                yield min(segment_1, segment_2), max(segment_1, segment_2), point
+            continue
+        if living.neighbours(segment_1)[1] != segment_2 or not reported.report(segment_1, segment_2):
+            continue
+        state.processed += 1
+        metrics.intersections += 1
+        yield min(segment_1, segment_2), max(segment_1, segment_2), point
+        living.swap(segment_1, segment_2)
+        metrics.intersection_tests += 2
+        find_new_event(segments, living.neighbours(segment_2)[0], segment_2, current_point, events, adjuster, cache, late, reported, ending)
+        find_new_event(segments, segment_1, living.neighbours(segment_1)[1], current_point, events, adjuster, cache, late, reported, ending)
+
+
+def bentley_ottmann(adjuster, segments, since=None, until=None, checkpoint=None, metrics=None, profiler=None, writer=None):
+    """
+    implementation of the Bentley Ottmann algorithm
+    - segments = SegmentStore, segments are handled through their indices
+    - since, until = if given, the sweep starts at height since and stops after the events at height until
+    - checkpoint = if given, the Checkpoint saving the sweep state (and maybe resuming from it)
+    - metrics = if given, the Metrics counting and reporting what the sweep does
+    - profiler = if given, the Profiler timing each phase of the sweep
+    - writer = if given, the CrossingsWriter the crossings are streamed to, instead of being kept in memory
+    returns the Crossings found and the timeline of the sweep
+    """
 
-        for segment in intersection:
-            living.sort(key=lambda segment: living_key(segment, current_point, adjuster))
-            left_segment, right_segment = nearest_living(segment, living)
-            find_new_event(segment, right_segment, current_point, events, results, adjuster)
-            find_new_event(left_segment, segment, current_point, events, results, adjuster)
+    state = checkpoint.load(segments) if checkpoint is not None else None
+    if state is None:
+        state = SweepState(adjuster, segments, since, until)
+    if writer is not None:
+        state.results.stream_to(writer)
+    for segment_1, segment_2, point in iter_intersections(adjuster, segments, state=state, checkpoint=checkpoint, metrics=metrics, profiler=profiler):
+        state.results.add(segment_1, segment_2, point)
+    if checkpoint is not None and not checkpoint.interrupted:
+        checkpoint.discard()
+    return state.results, state.timeline
 
-        graph[0] += [time() - start]
-        graph[1] += [len(list(set().union(*results.values())))]
-        progress_bar(len(events.heap), finished)
 
-    return results, graph
 
+ENGINES = {'bo': ('Bentley Ottmann', bentley_ottmann), 'grid': ('uniform grid', grid),
+           'parallel': ('parallel sweep', parallel_bentley_ottmann)}
 
 
-def test(filepath, bool_save, bool_tycat, bool_log):
+def test(filepath, *, bool_save=False, bool_tycat=False, engine='bo', checkpoint_options=None, reporting=('progress', 0.2), profiling=None, bool_crossings=False, thinning=None, density_options=None, compare=True, verification_options=None):
     """
-    - runs bentley ottmann and naive algorithm
+    the options are keyword only (see helpers.get_entries, which gives them as a dict) :
+    - runs the chosen engine (bentley ottmann by default) and, if compare = True, naive algorithm
+      (plotting the timelines of both)
+    - verification_options = None, or the options (mode, samples) of the sampled verification
+      of the crossings found against brute force (see verification.verify)
+    - if checkpoint_options are given (interval, budget, resume), the sweep state is
+      checkpointed in filepath.checkpoint
+    - reporting = (name of the reporter, interval between two reports) displaying the sweep metrics
+    - profiling = 'table' prints the time spent in each phase of the engine,
+      'dump' also saves the statistics of cProfile in ./outputs/name.pstats
+    - if bool_crossings = True, the crossings found by the engine are written next to the file (name.crossings)
+    - thinning = None to draw everything, else the svg is thinned to its resolution,
+      with at most thinning intersection markers per pixel (see geo.svg_stream)
+    - density_options = None, or the options of the density map saved in ./outputs
+      (file_format, width, height, with_segments, see geo.raster.save_density)
     - prints the number of intersections and crossings within segments found with b_o
     - prints the runtime for both algorithm
     - if bool_save = True, saves the figure with all the crossings found with b_o
     - if bool_tycat = True, displays the figure with all the crossings found with b_o
-    - if bool_log = True, save statistics in a log.csv file
+    returns the statistics (name of the figure, unique intersections, crossings, runtimes)
     """
 
     adjuster, segments = load_segments(filepath)
-    name_of_figure = re.match(r"(.*/|.*)(.+).bo", filepath).group(2)
-
-    # Launching Bentley-Ottmann
-    print("\n   Running Bentley Ottmann on {} ...\n".format(name_of_figure))
-    results_bo, graph_bo = bentley_ottmann(adjuster, segments)
+    name_of_figure = splitext(basename(filepath))[0]
+
+    # Launching Bentley-Ottmann (or the chosen engine)
+    name_of_engine, algorithm = ENGINES[engine]
+    print("\n   Running {} on {} ...\n".format(name_of_engine, name_of_figure))
+    checkpoint, options = None, {'metrics': metrics_for(*reporting)}
+    if engine == 'bo' and checkpoint_options is not None:
+        checkpoint = options['checkpoint'] = Checkpoint(filepath + '.checkpoint', **checkpoint_options)
+    profiler = None
+    if profiling is not None:
+        dump = './outputs/{}.pstats'.format(name_of_figure) if profiling == 'dump' else None
+        profiler = Profiler(hot_functions(sys.modules[__name__]), dump)
+        options['profiler'] = profiler
+    writer = None
+    if bool_crossings:
+        writer = options['writer'] = CrossingsWriter(splitext(filepath)[0] + '.crossings')
+    with profiler or nullcontext(), writer or nullcontext():
+        results_bo, timeline_bo = algorithm(adjuster, segments, **options)
+    if profiler is not None:
+        print("\n{}\n".format(profiler.table()))
 
     # Printing some statistics
-    unique_intersections = list(set().union(*results_bo.values()))
-    number_of_unique_intersections = len(unique_intersections)
-    number_of_crossings = sum([len(list) for list in results_bo.values()])
-    if graph_bo[0][-1] >= 1199:
+    results = results_bo
+    drawn = bool_save or bool_tycat
+    number_of_unique_intersections, unique_points = unique_statistics(results_bo, drawn)
+    number_of_crossings = 2 * len(results_bo) # each crossing is within two segments
+    if checkpoint is not None and checkpoint.interrupted:
+        runtime_bo = ">{}s".format(checkpoint.budget)
+        print("\n   Sweep interrupted, its state is saved in {} (go on with --resume)".format(checkpoint.filename))
+    elif engine == 'grid' and timeline_bo.elapsed() >= 1199: # the only engine stopping itself after 20m
         runtime_bo = ">20m"
     else:
-        runtime_bo = "{}m {}s".format(round(graph_bo[0][-1]//60), graph_bo[0][-1]%60)
+        runtime_bo = "{}m {}s".format(round(timeline_bo.elapsed()//60), timeline_bo.elapsed()%60)
     print("   Unique intersections          :   {}".format(number_of_unique_intersections))
     print("   Crossings within segments     :   {}".format(number_of_crossings))
-    print("   Runtime for Bentley Ottmann   :   {}\n".format(runtime_bo))
+    print("   Runtime for {:<18}:   {}\n".format(name_of_engine, runtime_bo))
+
+    if verification_options is not None:
+        verify_results(adjuster, segments, results_bo, verification_options)
+
+    if compare:
+        runtime_na, results_na = compare_with_naive(adjuster, segments, name_of_figure, name_of_engine, timeline_bo, reporting)
+        # If the engine didn't end (time budget, or 20m for grid), we save the results from the naive algorithm
+        if runtime_bo.startswith(">"):
+            results = results_na
+            number_of_unique_intersections, unique_points = unique_statistics(results_na, drawn)
+            number_of_crossings = 2 * len(results_na)
+    else:
+        runtime_na = "-"
+
+
+    # Printing and/or saving the figure with all the found crossings
+    # pylint: disable=import-outside-toplevel
+    if drawn:
+        x_coordinates, y_coordinates = unique_points
+        level_of_detail, markers_per_pixel = thinning is not None, thinning or 1
+    if bool_save:
+        from geo.svg_stream import save_svg_stream
+        save_svg_stream(segments, x_coordinates, y_coordinates, name_of_figure, level_of_detail, markers_per_pixel)
+    if bool_tycat:
+        from geo.tycat import tycat_stream
+        tycat_stream(segments, x_coordinates, y_coordinates, level_of_detail, markers_per_pixel)
+    if density_options is not None:
+        from geo.raster import save_density
+        # each crossing counts, from the columns or from the file they were streamed to
+        _, _, x_coordinates, y_coordinates = results.stored_columns()
+        save_density(segments, x_coordinates, y_coordinates, name_of_figure, **density_options)
+
+
+    return name_of_figure, number_of_unique_intersections, number_of_crossings, runtime_bo, runtime_na
+
+
+def unique_statistics(results, drawn):
+    """
+    number of unique intersection points of the Crossings results, and their coordinates if they are drawn (None else) :
+    the crossings are sorted (and read from their file, when they were streamed to one) only once
+    """
+    if not drawn:
+        return results.unique_count(), None
+    x_coordinates, y_coordinates = results.unique_coordinates()
+    return len(x_coordinates), (x_coordinates, y_coordinates)
+
+
+def verify_results(adjuster, segments, results, verification_options):
+    """
+    checks the crossings found against brute force on a sample and prints the estimated recall and precision
+    """
+    from verification import verify # pylint: disable=import-outside-toplevel
+    start = perf_counter()
+    report = verify(adjuster, segments, results.stored_columns(), **verification_options)
+    print("   Verified on                   :   {} random {} ({:.3f}s)".format(report['samples'], report['mode'], perf_counter() - start))
+    print("   Estimated recall              :   {} (95% bounds {:.2%} - {:.2%}, {} of {} crossings found)".format(
+        estimate(report['recall']), *report['recall_bounds'], report['found'], report['expected']))
+    print("   Estimated precision           :   {} (95% bounds {:.2%} - {:.2%}, {} of {} crossings confirmed)\n".format(
+        estimate(report['precision']), *report['precision_bounds'], report['confirmed'], report['checked']))
+    return report
+
+
+def estimate(ratio):
+    """
+    an estimated ratio as printed, None meaning too few crossings were sampled
+    """
+    return "{:.2%}".format(ratio) if ratio is not None else "too few crossings sampled"
+
+
+def compare_with_naive(adjuster, segments, name_of_figure, name_of_engine, timeline, reporting):
+    """
+    runs naive algorithm on the segments (its progress reported like the engine's, see test)
+    and plots its timeline with the one of the engine in ./outputs/name.png.
+    returns the runtime of naive algorithm (as printed) and its results
+    """
+    # pylint: disable=import-outside-toplevel
+    import matplotlib.pyplot as plt
+    from naive import naive
 
     # Launching naive algorithm
     print("\n   Running naive algorithm on {} ...\n".format(name_of_figure))
-    results_na, graph_na = naive(adjuster, segments)
-    if graph_na[0][-1] >= 1199:
+    results_na, timeline_na = naive(adjuster, segments, metrics=metrics_for(*reporting))
+    if timeline_na.elapsed() >= 1199:
         runtime_na = ">20m"
     else:
-        runtime_na = "{}m {}s".format(round(graph_na[0][-1]//60), graph_na[0][-1]%60)
+        runtime_na = "{}m {}s".format(round(timeline_na.elapsed()//60), timeline_na.elapsed()%60)
     print("   Runtime for naive algorithm   :   {}\n".format(runtime_na))
 
 
@@ -127,44 +404,70 @@ def test(filepath, bool_save, bool_tycat, bool_log):
     plt.xlabel('Time elapsed (s)')
     plt.ylabel('Intersections processed')
     plt.title('{}.png'.format(name_of_figure))
-    plt.plot(graph_bo[0], graph_bo[1], label='Bentley Ottmann')
-    plt.plot(graph_na[0], graph_na[1], label='Naive algorithm')
+    plt.plot(timeline.times, timeline.values, label=name_of_engine)
+    plt.plot(timeline_na.times, timeline_na.values, label='Naive algorithm')
     plt.legend()
     plt.savefig('./outputs/{}.png'.format(name_of_figure))
     plt.clf()
 
+    return runtime_na, results_na
 
-    # If Bentley-Ottmann didn't end before 20m, we save the results from the naive algorithm
-    if runtime_bo == ">20m":
-        unique_intersections = list(set().union(*results_na.values()))
-        number_of_unique_intersections = len(unique_intersections)
-        number_of_crossings = sum([len(list) for list in results_na.values()])
 
+def log(statistics):
+    """
+    saves the statistics of a file in a log.csv file
+    """
+    if not isfile("./log.csv"):
+        with open("log.csv", "w") as file:
+            file.write("File; Unique intersections;Crossings;Runtime with Bentley-Ottmann;Runtime with naive algorithm\n")
+    with open("log.csv", "a") as file:
+        file.write("{}; {}; {}; {}; {}\n".format(*statistics))
 
-    # Printing and/or saving the figure with all the found crossings
-    if bool_save:
-        save_svg([segments, unique_intersections], filepath)
-    if bool_tycat:
-        tycat(segments, unique_intersections)
+
+def batch_test(filepath, options):
+    """
+    runs test on a file in a worker process of the batch mode, with the options of test
+    (nothing is displayed nor reported) : its console output is dropped, only its statistics go back to the parent
+    """
+    with redirect_stdout(StringIO()):
+        return test(filepath, **dict(options, bool_tycat=False, reporting=('none', 0)))
 
 
-    #Saving the statistics in a csv file
-    if bool_log:
-        if not isfile("./log.csv"):
-            with open("log.csv", "w") as file:
-                file.write("File; Unique intersections;Crossings;Runtime with Bentley-Ottmann;Runtime with naive algorithm\n")
-        with open("log.csv", "a") as file:
-            file.write("{}; {}; {}; {}; {}\n".format(name_of_figure, number_of_unique_intersections, number_of_crossings, runtime_bo, runtime_na))
+def batch(filepaths, jobs, bool_log, options):
+    """
+    runs test on the files in a pool of jobs processes, with the options of test.
+    the parent alone displays the progress and writes the log, as files are done
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        tasks = {executor.submit(batch_test, filepath, options): filepath for filepath in filepaths}
+        for done, task in enumerate(as_completed(tasks), 1):
+            try:
+                statistics = task.result()
+            except Exception as error: # pylint: disable=broad-except
+                print("   [{}/{}] {} failed : {}".format(done, len(tasks), tasks[task], error))
+                continue
+            print("   [{}/{}] {} : {} unique intersections, {} crossings, runtimes {} and {} (naive)".format(done, len(tasks), *statistics))
+            if bool_log:
+                log(statistics)
 
 
 def main():
     """
     launch test on each file.
     """
-    bool_save, bool_tycat, bool_log, filepaths = get_entries()
+    options, bool_log, jobs, filepaths = get_entries()
 
+    if jobs > 1:
+        batch(filepaths, jobs, bool_log, options)
+        return
     for filepath in filepaths:
-        test(filepath, bool_save, bool_tycat, bool_log)
+        try:
+            statistics = test(filepath, **options)
+        except ValueError as error: # a truncated file : the other ones are still tested
+            print("   {} failed : {}".format(filepath, error))
+            continue
+        if bool_log:
+            log(statistics)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the SweepState and Checkpoint classes
+a SweepState holds everything a Bentley Ottmann sweep needs to go on,
+a Checkpoint saves it to a file from time to time, so that a long sweep
+can be stopped (time budget, preemption) and resumed later from the file
+"""
+
+import os
+import pickle
+from time import time
+from zlib import crc32
+from events import Events
+from living import Living
+from crossings_cache import CrossingsCache, ReportedPairs
+from crossings import Crossings
+from timeline import Timeline
+
+
+def fingerprint(segments):
+    """
+    number of segments and checksum of their coordinates :
+    a checkpoint can only be resumed on the segments it was saved from
+    """
+    checksum = 0
+    for column in (segments.x1, segments.y1, segments.x2, segments.y2):
+        checksum = crc32(column.tobytes(), checksum)
+    return len(segments), checksum
+
+
+class SweepState():
+    """
+    SweepState Class : the event queue, the status structure (living segments),
+    the results so far, the adjuster snapping them, the crossings already computed and the pairs already reported
+    """
+    def __init__(self, adjuster, segments, since=None, until=None):
+        self.adjuster = adjuster
+        self.events = Events(segments, since)
+        self.living = Living()
+        self.cache = CrossingsCache()
+        self.reported = ReportedPairs()
+        self.since, self.until = since, until
+        self.results = Crossings()
+        self.timeline = Timeline()        # This will be useful to observe the time complexity
+        self.processed = 0                # number of intersections processed so far
+        self.fingerprint = fingerprint(segments)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['elapsed'] = time() - self.timeline.start
+        return state
+
+    def __setstate__(self, state):
+        # the time spent before the checkpoint still counts
+        state['timeline'].start = time() - state.pop('elapsed')
+        self.__dict__.update(state)
+
+
+class Checkpoint():
+    """
+    Checkpoint Class
+    - filename = file where the sweep state is saved (none to never save it)
+    - interval = the state is saved every interval seconds (never if None)
+    - budget = the sweep stops after budget seconds, saving its state (never if None)
+    - resume = the sweep starts from the saved state, if there is one
+    """
+    def __init__(self, filename=None, interval=None, budget=None, resume=False):
+        self.filename = filename
+        self.interval = interval
+        self.budget = budget
+        self.resume = resume
+        self.start = time()
+        self.last_save = self.start
+        self.interrupted = False          # did the sweep stop before the end ?
+
+    def due(self):
+        """
+        is it time to save the state ?
+        """
+        return self.interval is not None and time() - self.last_save >= self.interval
+
+    def over_budget(self):
+        """
+        is the time budget exhausted ?
+        """
+        return self.budget is not None and time() - self.start >= self.budget
+
+    def save(self, state):
+        """
+        saves the sweep state, atomically : a preempted save leaves the previous checkpoint intact
+        """
+        self.last_save = time()
+        if self.filename is None:
+            return
+        if state.results.writer is not None:
+            state.results.writer.flush()
+        temporary = self.filename + '.tmp'
+        with open(temporary, 'wb') as file:
+            pickle.dump(state, file, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self.filename)
+
+    def load(self, segments):
+        """
+        returns the saved sweep state, None if there is no checkpoint to resume from.
+        raises ValueError if the checkpoint was saved from other segments.
+        """
+        if not self.resume or self.filename is None or not os.path.isfile(self.filename):
+            return None
+        with open(self.filename, 'rb') as file:
+            state = pickle.load(file)
+        if state.fingerprint != fingerprint(segments):
+            raise ValueError("{} was not saved from these segments".format(self.filename))
+        return state
+
+    def discard(self):
+        """
+        removes the checkpoint file once the sweep is over
+        """
+        if self.filename is not None and os.path.isfile(self.filename):
+            os.remove(self.filename)
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the Crossings class
+Crossings objects hold the results of the engines : the crossings they report, as parallel columns
+(segment a, segment b, x, y) growing in place. nothing else is kept : the engines report each
+pair of segments once, and the unique points are derived from the columns when asked for.
+the views derived on demand :
+- columns                       :   the four columns as numpy arrays, without copying them
+- stored_columns                :   the same, from the .crossings file if they were streamed to one
+- unique_count                  :   the number of unique intersection points (sorting them, a slice at a time)
+- unique_points                 :   the unique intersection points, as Point objects
+- unique_coordinates            :   the coordinates of the unique intersection points, as numpy arrays
+- by_segment                    :   the rows of the columns holding the crossings of each segment (indices, not copies)
+
+crossings can also be streamed to a .crossings file instead of being kept in memory (CrossingsWriter).
+a .crossings file is a 16 bytes header (MAGIC, then the number of records as a little endian
+unsigned 64 bits integer, 0 until the writer is closed) followed by 32 bytes records :
+segment a, segment b (little endian signed 64 bits integers), x, y (little endian doubles).
+load_crossings memory-maps it.
+"""
+
+import os
+from array import array
+import numpy as np
+from geo.point import Point
+
+MAGIC = b'BOCROSS1'
+HEADER = np.dtype([('magic', 'S8'), ('count', '<u8')])
+RECORD = np.dtype([('a', '<i8'), ('b', '<i8'), ('x', '<f8'), ('y', '<f8')])
+BUFFER_SIZE = 1 << 14 # records written at once
+CHUNK_SIZE = 1 << 22  # points read and sorted at once when looking for the unique ones
+SAMPLE_SIZE = 1 << 12 # heights sampled to cut the points into slices
+
+
+class Crossings():
+    """
+    Crossings Class
+    """
+    def __init__(self):
+        self.segments_1 = array('q')      # smallest segment of each pair
+        self.segments_2 = array('q')      # largest segment of each pair
+        self.x_coordinates = array('d')
+        self.y_coordinates = array('d')
+        self.count = 0                    # number of crossings
+        self.writer = None                # if given, the CrossingsWriter the columns go to
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['writer'] = None            # files cannot be pickled
+        return state
+
+    def __len__(self):
+        """
+        number of crossings (pairs of segments)
+        """
+        return self.count
+
+    def stream_to(self, writer):
+        """
+        writes the crossings added from now on to writer, instead of keeping their columns.
+        the first len(self) records of its file are kept : a resumed sweep wrote them before its checkpoint
+        """
+        writer.open(len(self))
+        self.writer = writer
+
+    def add(self, segment_1, segment_2, point):
+        """
+        adds the crossing of two segments at point (a (x, y) tuple).
+        the pair is not checked : it must not have been added before
+        """
+        if segment_1 > segment_2:
+            segment_1, segment_2 = segment_2, segment_1
+        self.count += 1
+        if self.writer is not None:
+            self.writer.write(segment_1, segment_2, point)
+            return
+        self.segments_1.append(segment_1)
+        self.segments_2.append(segment_2)
+        self.x_coordinates.append(point[0])
+        self.y_coordinates.append(point[1])
+
+    def unique_count(self):
+        """
+        number of unique intersection points, from the columns or from the file they were streamed to
+        (see unique_slices)
+        """
+        _, _, x_coordinates, y_coordinates = self.stored_columns()
+        return sum(len(points) for points in unique_slices(x_coordinates, y_coordinates))
+
+    def columns(self):
+        """
+        segments a, segments b, x and y coordinates, as numpy arrays sharing the memory
+        of the columns (valid until the next crossing is added).
+        crossings streamed to a file are not in the columns : see load_crossings
+        """
+        return (np.frombuffer(self.segments_1, dtype=np.int64), np.frombuffer(self.segments_2, dtype=np.int64),
+                np.frombuffer(self.x_coordinates, dtype=np.float64), np.frombuffer(self.y_coordinates, dtype=np.float64))
+
+    def stored_columns(self):
+        """
+        same as columns, read from the .crossings file (memory-mapped) when the crossings were streamed to one
+        (once the writer is closed)
+        """
+        return load_crossings(self.writer.filename) if self.writer is not None else self.columns()
+
+    def unique_points(self):
+        """
+        unique intersection points, as Point objects (for display)
+        """
+        x_coordinates, y_coordinates = self.unique_coordinates()
+        return [Point([x_coordinate, y_coordinate]) for x_coordinate, y_coordinate in zip(x_coordinates.tolist(), y_coordinates.tolist())]
+
+    def unique_coordinates(self):
+        """
+        x and y coordinates of the unique intersection points, as numpy arrays
+        """
+        _, _, x_coordinates, y_coordinates = self.stored_columns()
+        points = np.concatenate(list(unique_slices(x_coordinates, y_coordinates)))
+        return points.real.copy(), points.imag.copy()
+
+    def by_segment(self):
+        """
+        crossings of each segment, as indices into the rows of stored_columns (which are not copied) :
+        returns segments, starts, rows numpy arrays, the crossings of segments[k] being the rows
+        rows[starts[k]:starts[k+1]] (so their x coordinates are stored_columns()[2][rows[starts[k]:starts[k+1]]])
+        """
+        segments_1, segments_2, _, _ = self.stored_columns()
+        crossed = np.concatenate((segments_1, segments_2))
+        order = np.argsort(crossed, kind='stable')
+        segments, starts = np.unique(crossed[order], return_index=True)
+        return segments, np.append(starts, len(order)), order % max(len(segments_1), 1)
+
+
+class CrossingsWriter():
+    """
+    CrossingsWriter Class : writes crossings to a .crossings file as they are found,
+    a buffer of records at a time
+    - filename = the .crossings file
+
+        with CrossingsWriter("crossings.crossings") as writer:
+            bentley_ottmann(adjuster, segments, writer=writer)
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = None
+        self.count = 0                    # records in the file and in the buffer
+        self.buffer = ([], [], [], [])    # columns of the records not written yet
+
+    def open(self, kept=0):
+        """
+        opens the file, keeping its first kept records (a new file is created if kept is 0)
+        """
+        if kept and os.path.isfile(self.filename):
+            if os.path.getsize(self.filename) < HEADER.itemsize + kept * RECORD.itemsize:
+                raise ValueError("{} holds less than the {} crossings to keep".format(self.filename, kept))
+            self.file = open(self.filename, 'r+b')
+            self.file.truncate(HEADER.itemsize + kept * RECORD.itemsize)
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.file = open(self.filename, 'wb')
+            self.file.write(np.array([(MAGIC, 0)], dtype=HEADER).tobytes())
+            kept = 0
+        self.count = kept
+
+    def write(self, segment_1, segment_2, point):
+        """
+        adds a record
+        """
+        for column, value in zip(self.buffer, (segment_1, segment_2) + tuple(point)):
+            column.append(value)
+        self.count += 1
+        if len(self.buffer[0]) >= BUFFER_SIZE:
+            self.flush()
+
+    def flush(self):
+        """
+        writes the buffered records to the file (before a checkpoint, so that the file holds
+        every crossing of the saved state)
+        """
+        records = np.empty(len(self.buffer[0]), dtype=RECORD)
+        for name, column in zip(RECORD.names, self.buffer):
+            records[name] = column
+            column.clear()
+        self.file.write(records.tobytes())
+
+    def close(self):
+        """
+        writes the last records and the number of records in the header
+        """
+        if self.file is None:
+            return
+        self.flush()
+        self.file.seek(0)
+        self.file.write(np.array([(MAGIC, self.count)], dtype=HEADER).tobytes())
+        self.file.close()
+        self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+
+def unique_slices(x_coordinates, y_coordinates, chunk_size=CHUNK_SIZE):
+    """
+    unique points of given coordinates arrays, as sorted arrays of complex numbers x + iy
+    (-0.0 and 0.0 are the same coordinate, like in a set of tuples).
+    more than chunk_size points are cut into horizontal slices of about chunk_size points
+    (between heights of a sample) and the arrays are read a chunk at a time for each slice :
+    memory-mapped arrays are never loaded at once.
+    """
+    size = len(y_coordinates)
+    if size <= chunk_size:
+        yield np.unique(np.asarray(x_coordinates) + 1j * np.asarray(y_coordinates))
+        return
+    sample = np.asarray(y_coordinates[::max(1, size // SAMPLE_SIZE)])
+    heights = np.unique(np.quantile(sample, np.linspace(0, 1, -(-size // chunk_size) + 1)[1:-1]))
+    heights = np.concatenate(([-np.inf], heights, [np.inf]))
+    for low, high in zip(heights, heights[1:]): # slice (low, high]
+        points = []
+        for start in range(0, size, chunk_size):
+            chunk = np.asarray(y_coordinates[start:start+chunk_size])
+            inside = (chunk > low) & (chunk <= high)
+            points.append(np.asarray(x_coordinates[start:start+chunk_size])[inside] + 1j * chunk[inside])
+        yield np.unique(np.concatenate(points))
+
+
+def load_crossings(filename):
+    """
+    memory-maps given .crossings file (read only).
+    returns arrays of segments a, segments b, x and y coordinates, sharing the memory of the file.
+    raises ValueError if the file is not a .crossings file or is truncated.
+    """
+    size = os.path.getsize(filename)
+    header = np.fromfile(filename, dtype=HEADER, count=1)
+    if not len(header) or header['magic'][0] != MAGIC:
+        raise ValueError("{} is not a crossings file".format(filename))
+    records, rest = divmod(size - HEADER.itemsize, RECORD.itemsize)
+    if rest or header['count'][0] not in (0, records):
+        raise ValueError("{} is truncated ({} records, {} announced)".format(filename, records, header['count'][0]))
+    if not records:
+        records = np.empty(0, dtype=RECORD)
+    else:
+        records = np.memmap(filename, dtype=RECORD, mode='r', offset=HEADER.itemsize, shape=(records,))
+    return records['a'], records['b'], records['x'], records['y']
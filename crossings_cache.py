@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the CrossingsCache and ReportedPairs classes
+CrossingsCache objects remember the crossings of the pairs of living segments already tested :
+neighbours on the sweep line are tested again and again (after each swap, removal or insertion
+next to them), a test already done costs a dict lookup.
+the cache is bounded : when it is full, the oldest pairs are forgotten first,
+and the pairs of a segment are forgotten as soon as it leaves the sweep line.
+ReportedPairs objects remember the pairs of living segments already reported at an intersection event,
+so that the sweep reports each pair once.
+"""
+
+from collections import OrderedDict
+from helpers import find_crossing
+
+CAPACITY = 1 << 16 # maximum number of pairs kept
+MISSING = object() # marks pairs not in the cache (None means 'no crossing')
+
+
+class CrossingsCache():
+    """
+    CrossingsCache Class
+    - capacity = maximum number of pairs kept
+    """
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.crossings = OrderedDict()    # mapping of pairs (smallest segment first) to crossings, oldest first
+                                          # (its oldest pair is found at once, unlike the one of a dict emptied from its start)
+        self.pairs = {}                   # mapping of segments to the pairs they are in
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.crossings)
+
+    def crossing(self, segments, segment_1, segment_2, adjuster):
+        """
+        same result as find_crossing, computed only if the pair is not in the cache
+        """
+        pair = (segment_1, segment_2) if segment_1 < segment_2 else (segment_2, segment_1)
+        crossing = self.crossings.get(pair, MISSING)
+        if crossing is not MISSING:
+            self.hits += 1
+            return crossing
+        self.misses += 1
+        crossing = find_crossing(segments, pair[0], pair[1], adjuster)
+        if len(self.crossings) >= self.capacity:
+            self._forget(next(iter(self.crossings)))
+        self.crossings[pair] = crossing
+        for segment in pair:
+            self.pairs.setdefault(segment, set()).add(pair)
+        return crossing
+
+    def evict(self, segment):
+        """
+        forgets the pairs of a segment (when it leaves the sweep line)
+        """
+        for pair in self.pairs.pop(segment, ()):
+            del self.crossings[pair]
+            other_segment = pair[1] if pair[0] == segment else pair[0]
+            other_pairs = self.pairs[other_segment]
+            other_pairs.discard(pair)
+            if not other_pairs:
+                del self.pairs[other_segment]
+
+    def hit_ratio(self):
+        """
+        fraction of the tests answered by the cache
+        """
+        return self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0
+
+    def _forget(self, pair):
+        """
+        forgets a pair
+        """
+        del self.crossings[pair]
+        for segment in pair:
+            segment_pairs = self.pairs[segment]
+            segment_pairs.discard(pair)
+            if not segment_pairs:
+                del self.pairs[segment]
+
+
+class ReportedPairs():
+    """
+    ReportedPairs Class : at an intersection event every pair of segments striking through the point
+    is reported, but the crossing of a pair snapped near other crossings can also be scheduled at
+    another event. a pair is only reported at the first one.
+    the pairs of a segment are forgotten as soon as it leaves the sweep line.
+    """
+    def __init__(self):
+        self.partners = {}                # mapping of segments to the segments they were reported with
+
+    def __contains__(self, pair):
+        segment_1, segment_2 = pair
+        return segment_2 in self.partners.get(segment_1, ())
+
+    def report(self, segment_1, segment_2):
+        """
+        remembers the pair, returns False if it was already reported
+        """
+        partners = self.partners.setdefault(segment_1, set())
+        if segment_2 in partners:
+            return False
+        partners.add(segment_2)
+        self.partners.setdefault(segment_2, set()).add(segment_1)
+        return True
+
+    def evict(self, segment):
+        """
+        forgets the pairs of a segment (when it leaves the sweep line)
+        """
+        for other_segment in self.partners.pop(segment, ()):
+            other_partners = self.partners[other_segment]
+            other_partners.discard(segment)
+            if not other_partners:
+                del self.partners[other_segment]
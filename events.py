@@ -1,66 +1,149 @@
 #!/usr/bin/env python3
-#pylint: disable=R0913
 #pylint: disable=C0301
 
 """
 Definition of the Event class
-Event objects are a heaps where priority = y axis coordinates, x axis coordinates, counter
+Events come from two streams, merged when popped by priority = y axis coordinates, x axis coordinates :
+- endpoints events never change : they are sorted once, as arrays
+- intersection events are discovered during the sweep : they are kept in a small heap
+an intersection event and an endpoint event at the same point are a single event
 """
 
-import itertools
 from heapq import heappush, heappop
+import numpy as np
+
+# kinds of endpoints events
+LOWER, UPPER, HORIZONTAL = 0, 1, 2
+
 
 class Events():
     """
     Events Class
     """
-    def __init__(self, segments):
-        self.heap = []                    # list of events arranged in a heap
-        self.event_finder = {}            # mapping of points to events
-        self.counter = itertools.count()  # unique sequence count : events can all be differentied
-        for segment in segments:          # creation of the events from the iterable segments
-            upper_point = max(segment.endpoints, key=lambda point: point.coordinates[::-1])
-            lower_point = min(segment.endpoints, key=lambda point: point.coordinates[::-1])
-            if upper_point.coordinates[1] != lower_point.coordinates[1]:
-                self.add_event(lower_point, [], [segment], [], [])
-                self.add_event(upper_point, [], [], [segment], [])
-            else:
-                self.add_event(lower_point, [], [], [], [segment])
-
-    def add_event(self, point, intersection, lower, upper, horizontal):
+    def __init__(self, segments, since=None):
         """
-        Adds a new event or updates an existing event
-        - lower = [segments that have the point as a lower endpoint]
-        - upper = [segments that have the point as an upper endpoint]
+        - since = if given, segments starting below this height start at this height
+        """
+        self.heap = []                    # intersection events arranged in a heap
+        self.event_finder = {}            # mapping of points to intersection events
+        self.scheduled = set()            # pairs of segments in the intersection events
+
+        # creation of the endpoints events from the segments of the store :
+        # lower and upper endpoints of each segment, lower endpoint only for horizontal segments
+        horizontal = segments.y1 == segments.y2
+        lower_x, lower_y = segments.x1.copy(), segments.y1.copy()
+        if since is not None:
+            clipped = np.nonzero((segments.y1 < since) & ~horizontal)[0]
+            lower_x[clipped], _ = segments.keys_at(clipped, since)
+            lower_y[clipped] = since
+        indices = np.arange(len(segments))
+        sloped = np.nonzero(~horizontal)[0]
+        x_coordinates = np.concatenate((lower_x, segments.x2[sloped]))
+        y_coordinates = np.concatenate((lower_y, segments.y2[sloped]))
+        kinds = np.concatenate((np.where(horizontal, HORIZONTAL, LOWER), np.full(len(sloped), UPPER))).astype(np.int8)
+        segments_indices = np.concatenate((indices, sloped))
+
+        # sorted by y, then x, then kind, then segment : endpoints at the same point are consecutive
+        order = np.lexsort((segments_indices, kinds, x_coordinates, y_coordinates))
+        x_coordinates, y_coordinates = x_coordinates[order], y_coordinates[order]
+        new_point = np.ones(len(order), dtype=bool)
+        new_point[1:] = (x_coordinates[1:] != x_coordinates[:-1]) | (y_coordinates[1:] != y_coordinates[:-1])
+        starts = np.nonzero(new_point)[0]
+        self.x_coordinates, self.y_coordinates = x_coordinates[starts], y_coordinates[starts]
+        self.bounds = np.append(starts, len(order))
+        self.kinds = kinds[order]
+        self.segments = segments_indices[order]
+        self.next_endpoint = 0            # index of the next endpoints event
+        # zero-copy views giving python scalars, for fast access one event at a time
+        self.columns = tuple(memoryview(column) for column in
+                             (self.x_coordinates, self.y_coordinates, self.bounds, self.kinds, self.segments))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['columns']              # memoryviews cannot be pickled
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.columns = tuple(memoryview(column) for column in
+                             (self.x_coordinates, self.y_coordinates, self.bounds, self.kinds, self.segments))
+
+    def __len__(self):
+        """
+        Number of events left
+        """
+        return len(self.x_coordinates) - self.next_endpoint + len(self.heap)
+
+    def progress(self):
+        """
+        Fraction of the endpoints events already popped : it only grows, unlike the number of events left
+        """
+        return self.next_endpoint / len(self.x_coordinates) if len(self.x_coordinates) else 1.0
+
+    def add_event(self, point, intersection):
+        """
+        Adds a new intersection event or updates an existing one
         - intersection [segments that strike through the point but where
-          the point is not an endpoint of the said segments]
-        - horizontal = [horizontal segments that have the point as an endpoint]
+          the point is not an endpoint of the said segments], by pairs
+        Points are (x, y) tuples and segments are indices in the segment store
 
-        The events are sorted by priority where priority = event.coordinates[::-1], count
+        The events are sorted by priority where priority = point[::-1].
+        A pair already scheduled is not scheduled again (at a point snapped differently)
         """
         if point is None:
             return
+        pairs = [pair for pair in zip(intersection[::2], intersection[1::2]) if frozenset(pair) not in self.scheduled]
+        if not pairs:
+            return
+        self.scheduled.update(frozenset(pair) for pair in pairs)
+        intersection = [segment for pair in pairs for segment in pair]
+        if point not in self.event_finder:
+            event = [point[::-1], point, intersection]
+            self.event_finder[point] = event
+            heappush(self.heap, event)
         else:
-            if point not in self.event_finder:
-                count = next(self.counter)
-                event = [point.coordinates[::-1], count, point, intersection, lower, upper, horizontal]
-                self.event_finder[point] = event
-                heappush(self.heap, event)
-            else:
-                event = self.event_finder[point]
-                event[3] += intersection
-                event[4] += lower
-                event[5] += upper
-                event[6] += horizontal
+            self.event_finder[point][2] += intersection
+
+    def next_endpoint_point(self):
+        """
+        Returns the point of the next endpoints event, None if there is none left
+        """
+        if self.next_endpoint == len(self.x_coordinates):
+            return None
+        x_coordinates, y_coordinates = self.columns[:2]
+        return (x_coordinates[self.next_endpoint], y_coordinates[self.next_endpoint])
 
+    def next_point(self):
+        """
+        Returns the point of the lowest priority event, without removing it
+        """
+        endpoint = self.next_endpoint_point()
+        if not self.heap:
+            return endpoint
+        if endpoint is None or self.heap[0][0] < endpoint[::-1]:
+            return self.heap[0][1]
+        return endpoint
 
     def pop_event(self):
         """
         Removes and returns the lowest priority event. Raises KeyError if empty.
+        - lower = [segments that have the point as a lower endpoint]
+        - upper = [segments that have the point as an upper endpoint]
+        - horizontal = [horizontal segments that have the point as an endpoint]
         """
-        #pylint: disable=unused-variable
-        while self.heap:
-            [_, _, point, intersection, lower, upper, horizontal] = heappop(self.heap)
+        point = self.next_point()
+        if point is None:
+            raise KeyError('pop from an empty priority queue')
+        intersection, lower, upper, horizontal = [], [], [], []
+        if self.heap and self.heap[0][1] == point:
+            intersection = heappop(self.heap)[2]
             del self.event_finder[point]
-            return point, intersection, lower, upper, horizontal
-        raise KeyError('pop from an empty priority queue')
+            self.scheduled.difference_update(frozenset(pair) for pair in zip(intersection[::2], intersection[1::2]))
+        if self.next_endpoint < len(self.x_coordinates) and self.next_endpoint_point() == point:
+            _, _, bounds, kinds, segments = self.columns
+            start, end = bounds[self.next_endpoint], bounds[self.next_endpoint + 1]
+            by_kind = (lower, upper, horizontal)
+            for kind, segment in zip(kinds[start:end].tolist(), segments[start:end].tolist()):
+                by_kind[kind].append(segment)
+            self.next_endpoint += 1
+        return point, intersection, lower, upper, horizontal
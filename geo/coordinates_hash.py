@@ -2,33 +2,49 @@
 adjust points coordinates in O(1).
 (also hashes together nearby points)
 """
+import numpy as np
 from geo.point import Point
 
 # how much to we adjust ?
 PRECISION = 6
-PRECISION_FORMAT = "{{0:.{}f}}".format(PRECISION)
+# bits of the filters telling at once most coordinates of the scalar path have no cell in the arrays
+FILTER_BITS = 1 << 23
 
-def _coordinate_key(coordinate, wanted_precision=PRECISION):
+def _coordinate_key(coordinate, scale):
     """
-    return string display of given coordinate with wanted precision.
+    return integer key of given coordinate : its rounding to the grid of
+    step 1/scale (-0 and +0 get the same key).
     """
-    if wanted_precision == PRECISION:
-        used_format = PRECISION_FORMAT
-    else:
-        used_format = "{{0:.{}f}}".format(wanted_precision)
+    try:
+        return round(coordinate * scale)
+    except (OverflowError, ValueError):  # infinite or nan coordinates are their own key
+        return coordinate
 
-    key = used_format.format(coordinate)
-    if float(key) == 0.0:  # change any eventual -0 to +0
-        key = used_format.format(0.0)
-    return key
+def _displaced_coordinate_key(coordinate, scale):
+    """
+    return integer key of given coordinate on the grid
+    displaced by half a step.
+    """
+    try:
+        return round(coordinate * scale + 0.5)
+    except (OverflowError, ValueError):
+        return coordinate
 
-def _displaced_coordinate_key(coordinate, wanted_precision=PRECISION):
+def _runs(keys):
     """
-    return string display of given coordinate
-    displaced by half precision.
+    runs of equal values of a sorted array : returns the distinct values and the start of their runs
     """
-    wanted_limit = 5.0 * 10**(-wanted_precision+1)
-    return _coordinate_key(coordinate + wanted_limit, wanted_precision)
+    starts = np.flatnonzero(np.diff(keys, prepend=np.nan) != 0)
+    return keys[starts], starts
+
+def _filter(keys):
+    """
+    bitmap of integer keys modulo FILTER_BITS : a key whose bit is not set is not one of them
+    """
+    bits = keys.astype(np.int64) & (FILTER_BITS - 1)
+    bitmap = np.zeros(FILTER_BITS // 8, dtype=np.uint8)
+    np.bitwise_or.at(bitmap, bits >> 3, np.left_shift(1, bits & 7).astype(np.uint8))
+    return bitmap.tobytes()
 
 class CoordinatesHash:
     """
@@ -41,15 +57,33 @@ class CoordinatesHash:
         - if any two coordinates have a difference less than
         0.5*10**-wanted_precision then they will be merged to the value of the
         most ancient in the hash.
+
+    coordinates are quantized to integers on two grids of step 10**-wanted_precision,
+    the second one displaced by half a step : two close coordinates are
+    in the same cell of at least one of the grids.
     """
     #pylint: disable=too-few-public-methods
     def __init__(self, wanted_precision=PRECISION, dimension=2):
         # we need 2*dimension hashes to test
         # displaced and non displaced keys
         self.hashes = [{} for _ in range(2*dimension)]
+        # cells filled by hash_array : sorted keys and their values for each hash,
+        # looked up (and then remembered in the hash) only when a coordinate falls in them
+        self.cells = [(np.empty(0), np.empty(0)) for _ in range(2*dimension)]
+        self.filters = [None] * (2*dimension)
         self.precision = wanted_precision
+        self.scale = 10.0**wanted_precision
         self.fast_hash = set()  # fast test for exact match
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['filters']              # bitmaps of 1MB each : rebuilt from the cells
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.filters = [_filter(keys) if len(keys) else None for keys, _ in self.cells]
+
     def hash_point(self, point):
         """
         add a point to the hash, returning new point with adjusted coordinates.
@@ -57,23 +91,98 @@ class CoordinatesHash:
         if point in self.fast_hash:
             return point
 
-        new_coordinates = [self.__hash_coordinate(c, i) for i, c in enumerate(point.coordinates)]
-        new_point = Point(new_coordinates)
+        new_point = Point(list(self.hash_coordinates(point.coordinates)))
 
         self.fast_hash.add(new_point)
         return new_point
 
-    def __hash_coordinate(self, coordinate, index=0):
+    def hash_coordinates(self, coordinates):
+        """
+        add a point given by its coordinates to the hash,
+        returning a tuple of adjusted coordinates.
+        """
+        return tuple(self.hash_coordinate(c, i) for i, c in enumerate(coordinates))
+
+    def hash_array(self, array):
+        """
+        adjust in place an array of coordinates, seen as rows of points
+        (for example x1, y1, x2, y2 rows are two points).
+        on an empty hash, keys are computed for the whole array at once and the cells are resolved
+        with numpy, in order of first appearance of the coordinates : each cell of the grid takes
+        the first coordinate falling in it, then the cells whose first coordinates fall in the same cell
+        of the displaced grid all take the first of them. the cells are kept as arrays, the scalar path
+        only looks up the ones it needs.
+        hashing the points one after the other can differ, when a coordinate is merged through
+        the displaced grid before another one falls in its cell (which it would then take).
+        a hash already holding coordinates resolves each distinct coordinate through the scalar path.
+        """
+        dimension = len(self.hashes) // 2
+        points = array.reshape(-1, dimension)
+        empty = not any(self.hashes) and not any(len(keys) for keys, _ in self.cells)
+        for index in range(dimension):
+            column = points[:, index]
+            values, first_seen, inverse = np.unique(column, return_index=True, return_inverse=True)
+            adjusted = values.copy()
+            if not empty:
+                order = np.argsort(first_seen, kind='stable')
+                adjusted[order] = [self.hash_coordinate(coordinate, index) for coordinate in values[order].tolist()]
+                column[:] = adjusted[inverse.reshape(-1)]
+                continue
+
+            # values are sorted, so are their keys : a cell is a run of equal keys, taken by the value
+            # seen first. non finite coordinates are their own key (and sorted at both ends) : they stay as they are
+            finite = np.flatnonzero(np.isfinite(values))
+            if not len(finite):
+                continue
+            finite = slice(finite[0], finite[-1] + 1)
+            cell_keys, cell_starts = _runs(np.rint(values[finite] * self.scale))
+            cell_first = np.minimum.reduceat(first_seen[finite], cell_starts)
+            # the same for the displaced cells of the values taking a cell (they are sorted too)
+            displaced_keys, displaced_starts = _runs(np.rint(column[cell_first] * self.scale + 0.5))
+            displaced_values = column[np.minimum.reduceat(cell_first, displaced_starts)]
+            cell_values = np.repeat(displaced_values, np.diff(displaced_starts, append=len(cell_keys)))
+
+            self.cells[2*index] = (cell_keys, cell_values)
+            self.cells[2*index+1] = (displaced_keys, displaced_values)
+            self.filters[2*index], self.filters[2*index+1] = _filter(cell_keys), _filter(displaced_keys)
+            adjusted[finite] = np.repeat(cell_values, np.diff(cell_starts, append=finite.stop - finite.start))
+            column[:] = adjusted[inverse.reshape(-1)]
+
+    def _cell(self, hash_index, key):
+        """
+        value of a cell filled by hash_array, None if there is none (it is then remembered in the hash).
+        the filter of the hash tells at once most keys have none
+        """
+        bit = key & (FILTER_BITS - 1)
+        if not self.filters[hash_index][bit >> 3] >> (bit & 7) & 1:
+            return None
+        keys, values = self.cells[hash_index]
+        position = keys.searchsorted(key)
+        if position < len(keys) and keys[position] == key:
+            value = self.hashes[hash_index][key] = float(values[position])
+            return value
+        return None
+
+    def hash_coordinate(self, coordinate, index=0):
         """
         add 1 coordinate (given index) to the hash, adjusting it if needed.
         """
-        key = _coordinate_key(coordinate, self.precision)
-        displaced_key = _displaced_coordinate_key(coordinate, self.precision)
-        if key in self.hashes[2*index]:
-            return self.hashes[2*index][key]
-        if displaced_key in self.hashes[2*index+1]:
-            return self.hashes[2*index+1][displaced_key]
-
-        self.hashes[2*index][key] = coordinate
-        self.hashes[2*index+1][displaced_key] = coordinate
+        hashed, displaced_hashed = self.hashes[2*index], self.hashes[2*index+1]
+        key = _coordinate_key(coordinate, self.scale)
+        if key in hashed:
+            return hashed[key]
+        filled = self.filters[2*index] is not None and isinstance(key, int)
+        if filled:
+            value = self._cell(2*index, key)
+            if value is not None:
+                return value
+        displaced_key = _displaced_coordinate_key(coordinate, self.scale)
+        if displaced_key in displaced_hashed:
+            return displaced_hashed[displaced_key]
+        if filled:
+            value = self._cell(2*index+1, displaced_key)
+            if value is not None:
+                return value
+
+        hashed[key] = displaced_hashed[displaced_key] = coordinate
         return coordinate
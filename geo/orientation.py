@@ -0,0 +1,147 @@
+"""
+orientation predicates and segments intersection built on them.
+a floating point filter answers almost all tests. when it cannot decide,
+the determinant is expanded into exact products summed with fsum,
+and exact rational arithmetic is only used for extreme magnitudes.
+"""
+from math import fsum
+from fractions import Fraction
+import numpy as np
+
+# bound on the rounding error of the orientation determinant,
+# relative to the sum of its terms (see Shewchuk, adaptive precision predicates)
+EPSILON = 2.0**-53
+ERROR_BOUND = (3.0 + 16.0 * EPSILON) * EPSILON
+# products of coordinates in this range are computed exactly by two_product
+SPLITTER = 134217729.0  # 2**27 + 1
+SAFE_RANGE = (2.0**-450, 2.0**450)
+
+
+def two_product(a, b):
+    """
+    product of two floats as an exact sum of two floats (dekker's algorithm).
+    """
+    product = a * b
+    split = SPLITTER * a
+    a_high = split - (split - a)
+    a_low = a - a_high
+    split = SPLITTER * b
+    b_high = split - (split - b)
+    b_low = b - b_high
+    return product, a_low * b_low - (((product - a_high * b_high) - a_low * b_high) - a_high * b_low)
+
+
+def exact_orientation(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    sign of (b - a) x (c - a), computed exactly.
+    """
+    coordinates = [abs(c) for c in (a_x, a_y, b_x, b_y, c_x, c_y) if c]
+    if not coordinates or SAFE_RANGE[0] < min(coordinates) and max(coordinates) < SAFE_RANGE[1]:
+        # (b - a) x (c - a) = bx cy - bx ay - ax cy - by cx + by ax + ay cx
+        determinant = fsum((*two_product(b_x, c_y), *two_product(-b_x, a_y), *two_product(-a_x, c_y),
+                            *two_product(-b_y, c_x), *two_product(b_y, a_x), *two_product(a_y, c_x)))
+    else:
+        a_x, a_y = Fraction(a_x), Fraction(a_y)
+        determinant = (Fraction(b_x) - a_x) * (Fraction(c_y) - a_y) - \
+            (Fraction(b_y) - a_y) * (Fraction(c_x) - a_x)
+    return (determinant > 0) - (determinant < 0)
+
+
+def orientation(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    sign of the cross product (b - a) x (c - a) :
+    1 if a, b, c turn left, -1 if they turn right, 0 if they are aligned.
+    """
+    direction_x, direction_y = b_x - a_x, b_y - a_y
+    other_direction_x, other_direction_y = c_x - a_x, c_y - a_y
+    left = direction_x * other_direction_y
+    right = direction_y * other_direction_x
+    determinant = left - right
+    bound = ERROR_BOUND * (abs(left) + abs(right))
+    if determinant > bound:
+        return 1
+    if -determinant > bound:
+        return -1
+    if (direction_x == 0 or other_direction_y == 0) and (direction_y == 0 or other_direction_x == 0):
+        return 0  # differences of floats are exact zeros : so is the determinant
+    if c_x == b_x and c_y == b_y:
+        return 0
+    return exact_orientation(a_x, a_y, b_x, b_y, c_x, c_y)
+
+
+def orientations(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    orientation on arrays of points (broadcasting like numpy).
+    only the cases the filter cannot decide are computed exactly, one at a time.
+    """
+    a_x, a_y, b_x, b_y, c_x, c_y = np.broadcast_arrays(a_x, a_y, b_x, b_y, c_x, c_y)
+    left = (b_x - a_x) * (c_y - a_y)
+    right = (b_y - a_y) * (c_x - a_x)
+    determinant = left - right
+    signs = np.sign(determinant).astype(np.int8)
+    np.abs(left, out=left)
+    np.abs(right, out=right)
+    left += right
+    left *= ERROR_BOUND
+    for index in zip(*np.nonzero(np.abs(determinant, out=determinant) <= left)):
+        signs[index] = orientation(a_x[index], a_y[index], b_x[index], b_y[index], c_x[index], c_y[index])
+    return signs
+
+
+def sign(value):
+    """
+    sign of a number : 1, 0 or -1.
+    """
+    return (value > 0) - (value < 0)
+
+
+def side(a_x, a_y, b_x, b_y, c_x, c_y):
+    """
+    same sign as orientation(a, b, c), with the floating point filter inlined :
+    returns the float determinant when it is certain.
+    """
+    left = (b_x - a_x) * (c_y - a_y)
+    right = (b_y - a_y) * (c_x - a_x)
+    determinant = left - right
+    if abs(determinant) > ERROR_BOUND * (abs(left) + abs(right)):
+        return determinant
+    return orientation(a_x, a_y, b_x, b_y, c_x, c_y)
+
+
+def intersection(start, end, other_start, other_end):
+    """
+    intersection point (x, y) of two 2d segments given by their endpoints coordinates.
+    none if they do not intersect or if they are aligned.
+    when a segment only touches the other, the touching endpoint is returned exactly.
+    """
+    # pylint: disable=too-many-return-statements
+    (a_x, a_y), (b_x, b_y), (c_x, c_y), (d_x, d_y) = start, end, other_start, other_end
+    side_1 = sign(side(a_x, a_y, b_x, b_y, c_x, c_y))
+    side_2 = sign(side(a_x, a_y, b_x, b_y, d_x, d_y))
+    if side_1 == side_2:
+        return None  # other segment on one side, or aligned segments
+    other_side_1 = sign(side(c_x, c_y, d_x, d_y, a_x, a_y))
+    other_side_2 = sign(side(c_x, c_y, d_x, d_y, b_x, b_y))
+    if other_side_1 == other_side_2:
+        return None
+    if side_1 == 0:
+        return other_start
+    if side_2 == 0:
+        return other_end
+    if other_side_1 == 0:
+        return start
+    if other_side_2 == 0:
+        return end
+    return line_intersection(start, end, other_start, other_end)
+
+
+def line_intersection(start, end, other_start, other_end):
+    """
+    intersection point of the two lines through the segments (which must not be parallel).
+    """
+    direction_x, direction_y = end[0] - start[0], end[1] - start[1]
+    other_direction_x, other_direction_y = other_end[0] - other_start[0], other_end[1] - other_start[1]
+    denominator = direction_x * other_direction_y - direction_y * other_direction_x
+    alpha = ((other_start[0] - start[0]) * other_direction_y -
+             (other_start[1] - start[1]) * other_direction_x) / denominator
+    return (start[0] + direction_x * alpha, start[1] + direction_y * alpha)
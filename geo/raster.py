@@ -0,0 +1,129 @@
+#pylint: disable=C0301
+
+"""
+density maps of large scenes : the intersection points (and the segments covering each pixel)
+are counted in a width x height grid over the bounding quadrant of the scene,
+then saved as a png heatmap or as a raw .npy array.
+points and segments are binned a chunk at a time : the memory needed depends on the number
+of pixels, not on the number of intersections (which can come from a memory-mapped .crossings file).
+rows of the grid go from the smallest y to the largest one, like in the svg figures.
+"""
+
+import os
+import numpy as np
+from geo.svg_stream import bounding_quadrant
+
+CHUNK_SIZE = 1 << 20 # points (or samples of segments) binned at once
+
+
+class Grid:
+    """
+    a width x height grid of pixels over a quadrant
+    """
+    def __init__(self, quadrant, width, height):
+        self.width, self.height = width, height
+        (self.min_x, self.min_y), (max_x, max_y) = quadrant.get_arrays()
+        self.pixel_width = (max_x - self.min_x) / width
+        self.pixel_height = (max_y - self.min_y) / height
+
+    def cells(self, x_coordinates, y_coordinates):
+        """
+        index of the pixel holding each point, row after row
+        (points on the max borders go to the last pixels)
+        """
+        columns = np.clip(((x_coordinates - self.min_x) / self.pixel_width).astype(np.int64), 0, self.width - 1)
+        rows = np.clip(((y_coordinates - self.min_y) / self.pixel_height).astype(np.int64), 0, self.height - 1)
+        return rows * self.width + columns
+
+    def count(self, cells):
+        """
+        number of cells in each pixel, as a (height, width) array
+        """
+        return np.bincount(cells, minlength=self.width * self.height).reshape(self.height, self.width)
+
+
+def point_density(grid, x_coordinates, y_coordinates):
+    """
+    number of points in each pixel of the grid
+    """
+    density = np.zeros((grid.height, grid.width), dtype=np.int64)
+    for start in range(0, len(x_coordinates), CHUNK_SIZE):
+        density += grid.count(grid.cells(np.asarray(x_coordinates[start:start+CHUNK_SIZE], dtype=np.float64),
+                                         np.asarray(y_coordinates[start:start+CHUNK_SIZE], dtype=np.float64)))
+    return density
+
+
+def segment_density(grid, segments):
+    """
+    number of segments going through each pixel of the grid.
+    segments are sampled once per pixel crossed along their main direction.
+    """
+    density = np.zeros((grid.height, grid.width), dtype=np.int64)
+    x_1, y_1, x_2, y_2 = segments.x1, segments.y1, segments.x2, segments.y2
+    samples = np.maximum(np.abs(x_2 - x_1) / grid.pixel_width, np.abs(y_2 - y_1) / grid.pixel_height).astype(np.int64) + 1
+    ends = np.cumsum(samples)
+    start = 0
+    while start < len(samples):
+        # segments whose samples fit in a chunk (at least one segment)
+        stop = max(start + 1, int(np.searchsorted(ends, ends[start] - samples[start] + CHUNK_SIZE, side='right')))
+        counts = samples[start:stop]
+        owners = np.repeat(np.arange(start, stop), counts)
+        # position of each sample along its segment, from 0 to 1
+        offsets = np.arange(len(owners)) - np.repeat(np.cumsum(counts) - counts, counts)
+        ratios = (offsets + 0.5) / counts.repeat(counts)
+        cells = grid.cells(x_1[owners] + (x_2[owners] - x_1[owners]) * ratios,
+                           y_1[owners] + (y_2[owners] - y_1[owners]) * ratios)
+        # a segment counts once in each pixel : its samples in a same pixel follow each other
+        kept = np.r_[True, (cells[1:] != cells[:-1]) | (owners[1:] != owners[:-1])]
+        density += grid.count(cells[kept])
+        start = stop
+    return density
+
+
+def density_maps(segments, x_coordinates, y_coordinates, width=800, height=600, with_segments=False):
+    """
+    density of the intersection points (given by their coordinates arrays) and, if with_segments,
+    of the segments, as (height, width) arrays (the second one being None without segments)
+    """
+    nowhere = np.empty(0)
+    grid = Grid(bounding_quadrant(segments, nowhere, nowhere), width, height) # intersections are on the segments
+    points = point_density(grid, x_coordinates, y_coordinates)
+    return points, segment_density(grid, segments) if with_segments else None
+
+
+def density_image(points, coverage=None):
+    """
+    rgba image of the densities : intersections on a heatmap (log scale),
+    over the segments in shades of grey if their coverage is given
+    """
+    # pylint: disable=import-outside-toplevel
+    import matplotlib.pyplot as plt # only for png files
+    image = np.ones(points.shape + (4,))
+    if coverage is not None and coverage.any():
+        shade = 1 - 0.6 * np.log1p(coverage) / np.log1p(coverage.max())
+        image[..., :3] = shade[..., np.newaxis]
+    if points.any():
+        crossed = points > 0
+        scale = np.log1p(points[crossed]) / np.log1p(points.max())
+        image[crossed] = plt.get_cmap('inferno_r')(0.2 + 0.8 * scale)
+    return image
+
+
+def save_density(segments, x_coordinates, y_coordinates, name, file_format='png', width=800, height=600, with_segments=False):
+    """
+    save the density maps as ./outputs/name.density.png (heatmap) or ./outputs/name.density.npy
+    (intersections counts, then segments counts if with_segments, stacked),
+    name being the name of the figure (see bo.test). returns the name of the file.
+    """
+    directory = "./outputs"
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    filename = "{}/{}.density.{}".format(directory, name, file_format)
+    points, coverage = density_maps(segments, x_coordinates, y_coordinates, width, height, with_segments)
+    if file_format == 'npy':
+        np.save(filename, np.stack((points, coverage)) if coverage is not None else points)
+    else:
+        import matplotlib.pyplot as plt # pylint: disable=import-outside-toplevel
+        plt.imsave(filename, density_image(points, coverage))
+    return filename
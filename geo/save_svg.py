@@ -36,6 +36,7 @@ class Displayer:
         ]
         ratios = [a/b for a, b in zip(self.svg_dimensions, self.dimensions)]
         scale = min(ratios)
+        self.pixel_size = 1/scale
         self.stroke_size = 3/scale
 
     def open_svg(self, filepath):
@@ -1,11 +1,15 @@
 """
 segment between two points.
 """
-import struct
+import os
+import numpy as np
 from geo.point import Point
 from geo.quadrant import Quadrant
 from geo.coordinates_hash import CoordinatesHash
+from geo.orientation import intersection
 
+# size of a segment in .bo files : 4 doubles
+RECORD_SIZE = 32
 
 class Segment:
     """
@@ -69,13 +73,11 @@ class Segment:
         """
         intersect two 2d segments.
         only return point if included on the two segments.
+        uses exact orientation tests (no tolerance), aligned segments do not intersect.
         """
-        i = self.line_intersection_with(other)
-        if i is None:
-            return  # parallel lines
-
-        if self.contains(i) and other.contains(i):
-            return i
+        point = intersection(*(p.coordinates for p in self.endpoints + other.endpoints))
+        if point is not None:
+            return Point(list(point))
 
     def line_intersection_with(self, other):
         """
@@ -114,22 +116,36 @@ class Segment:
             repr(self.endpoints[1]) + "])"
 
 
+def load_coordinates(filename):
+    """
+    memory-maps given .bo file (copy on write : the file itself is never modified).
+    returns a (n, 4) array of segments coordinates x1, y1, x2, y2.
+    raises ValueError if the file is truncated.
+    """
+    size = os.path.getsize(filename)
+    if size % RECORD_SIZE:
+        raise ValueError("{} is truncated ({} bytes is not a multiple of {})".format(
+            filename, size, RECORD_SIZE))
+    if not size:
+        return np.empty((0, 4))
+    return np.memmap(filename, dtype=np.float64, mode='c').reshape(-1, 4)
+
+
+def save_coordinates(filename, coordinates):
+    """
+    writes a (n, 4) array of segments coordinates x1, y1, x2, y2 to a .bo file.
+    """
+    np.asarray(coordinates, dtype=np.float64).reshape(-1, 4).tofile(filename)
+
+
 def load_segments(filename):
     """
     loads given .bo file.
-    returns a vector of segments.
+    returns a store of segments.
     """
-    coordinates_struct = struct.Struct('4d')
-    segments = []
+    # pylint: disable=import-outside-toplevel
+    from geo.segment_store import SegmentStore  # segment_store depends on us
     adjuster = CoordinatesHash()
-
-    with open(filename, "rb") as bo_file:
-        packed_segment = bo_file.read(32)
-        while packed_segment:
-            coordinates = coordinates_struct.unpack(packed_segment)
-            raw_points = [Point(coordinates[0:2]), Point(coordinates[2:])]
-            adjusted_points = [adjuster.hash_point(p) for p in raw_points]
-            segments.append(Segment(adjusted_points))
-            packed_segment = bo_file.read(32)
-
-    return adjuster, segments
+    coordinates = load_coordinates(filename)
+    adjuster.hash_array(coordinates)
+    return adjuster, SegmentStore(coordinates)
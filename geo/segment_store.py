@@ -0,0 +1,110 @@
+"""
+compact storage of many segments, as columns of coordinates.
+segments are referred to by their index in the store.
+"""
+import numpy as np
+from geo.point import Point
+from geo.segment import Segment
+from geo.orientation import intersection
+
+
+class SegmentStore:
+    """
+    a segment store keeps n segments in contiguous arrays
+    (x1, y1, x2, y2 plus precomputed slopes), oriented from their lower endpoint
+    (smallest y, then smallest x) to their upper endpoint.
+
+    the position of a sloped segment on an horizontal sweep line is given by its key
+    (x coordinate at the height of the line, inverse slope) : segments crossing the line
+    at the same point are ordered from left to right above it by their inverse slopes.
+
+    for example:
+
+    - create a store from a (n, 4) array of x1, y1, x2, y2 coordinates:
+
+        store = SegmentStore(coordinates)
+
+    - compute intersection point between segments 3 and 5:
+
+        intersection = store.intersection(3, 5)
+
+    - get segment 3 as a Segment object (for display):
+
+        segment = store[3]
+    """
+    def __init__(self, coordinates):
+        """
+        create a store from an array of segments coordinates.
+        the columns are views over the array, whose segments are oriented in place
+        (a memory-mapped .bo file is copied on write : the file itself is never modified).
+        """
+        coordinates = np.asarray(coordinates, dtype=np.float64).reshape(-1, 4)
+        reversed_segments = (coordinates[:, 1] > coordinates[:, 3]) | \
+            ((coordinates[:, 1] == coordinates[:, 3]) & (coordinates[:, 0] > coordinates[:, 2]))
+        coordinates[reversed_segments] = coordinates[reversed_segments][:, [2, 3, 0, 1]]
+        x_1, y_1, x_2, y_2 = coordinates.T
+        self.x1, self.y1, self.x2, self.y2 = x_1, y_1, x_2, y_2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.slope = (y_2 - y_1) / (x_2 - x_1)
+            self.inverse_slope = (x_2 - x_1) / (y_2 - y_1)
+        # zero-copy views giving python floats, for fast access one segment at a time
+        self.columns = tuple(memoryview(column) for column in
+                             (self.x1, self.y1, self.x2, self.y2, self.inverse_slope))
+
+    def __len__(self):
+        return len(self.x1)
+
+    def __getitem__(self, index):
+        """
+        return segment at given index as a Segment object.
+        """
+        x_1, y_1, x_2, y_2, _ = self.columns
+        return Segment([Point([x_1[index], y_1[index]]), Point([x_2[index], y_2[index]])])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def lower(self, index):
+        """
+        return coordinates of lower endpoint of given segment.
+        """
+        return (self.columns[0][index], self.columns[1][index])
+
+    def upper(self, index):
+        """
+        return coordinates of upper endpoint of given segment.
+        """
+        return (self.columns[2][index], self.columns[3][index])
+
+    def x_at(self, index, y_coordinate):
+        """
+        return x coordinate of the line through given segment at given height.
+        """
+        x_1, y_1, _, _, inverse_slope = self.columns
+        return x_1[index] + (y_coordinate - y_1[index]) * inverse_slope[index]
+
+    def key_at(self, index, y_coordinate):
+        """
+        return sweep line key of given segment at given height.
+        """
+        x_1, y_1, _, _, inverse_slope = self.columns
+        return (x_1[index] + (y_coordinate - y_1[index]) * inverse_slope[index], inverse_slope[index])
+
+    def keys_at(self, indices, y_coordinate):
+        """
+        return sweep line keys of many segments at given height,
+        as arrays of x coordinates and of inverse slopes.
+        """
+        inverse_slope = self.inverse_slope[indices]
+        return self.x1[indices] + (y_coordinate - self.y1[indices]) * inverse_slope, inverse_slope
+
+    def intersection(self, index_1, index_2):
+        """
+        intersect two segments of the store (same results as Segment.intersection_with).
+        return coordinates of intersection point, none if there is none
+        or if segments are aligned.
+        """
+        x_1, y_1, x_2, y_2, _ = self.columns
+        return intersection((x_1[index_1], y_1[index_1]), (x_2[index_1], y_2[index_1]),
+                            (x_1[index_2], y_1[index_2]), (x_2[index_2], y_2[index_2]))
@@ -0,0 +1,135 @@
+#pylint: disable=C0301
+
+"""
+save large scenes (segments of a SegmentStore and intersection points) as svg files.
+unlike save_svg nothing is built in memory : the bounding quadrant is computed with numpy
+in one pass and the svg fragments are written to the file a chunk at a time.
+with level of detail the output is thinned to the resolution of the image :
+    - segments shorter than a pixel are merged, one dot per pixel
+    - other segments are rounded to a fraction of pixel and each one is drawn once
+    - at most markers_per_pixel intersection markers are drawn per pixel
+time and size of the output then depend on the resolution of the image, not on the size of the scene.
+"""
+
+import os
+import numpy as np
+from geo.quadrant import Quadrant
+from geo.save_svg import Displayer
+
+CHUNK_SIZE = 1 << 14 # fragments written at once
+SUBDIVISIONS = 4     # with level of detail, coordinates are rounded to 1/SUBDIVISIONS of pixel
+
+
+def bounding_quadrant(segments, x_coordinates, y_coordinates):
+    """
+    return min quadrant containing the segments and the points.
+    an empty or flat quadrant is inflated, so that it can be displayed.
+    """
+    quadrant = Quadrant.empty_quadrant(2)
+    for x_column, y_column in ((segments.x1, segments.y1), (segments.x2, segments.y2), (x_coordinates, y_coordinates)):
+        if len(x_column):
+            quadrant.update(Quadrant((float(x_column.min()), float(y_column.min())), (float(x_column.max()), float(y_column.max()))))
+    if quadrant.min_coordinates[0] == float('+inf'):
+        return Quadrant((0.0, 0.0), (1.0, 1.0))
+    for index in range(2):
+        low, high = quadrant.limits(index)
+        if low == high:
+            quadrant.min_coordinates[index], quadrant.max_coordinates[index] = low - 0.5, high + 0.5
+    return quadrant
+
+
+def write_svg(filename, segments, x_coordinates, y_coordinates, level_of_detail=False, markers_per_pixel=1):
+    """
+    write segments (in red) and points (in green, given by their coordinates arrays) in an svg file.
+    returns the numbers of segments and of markers written.
+    - level_of_detail = thin the output to the resolution of the image (see above)
+    - markers_per_pixel = with level of detail, maximum number of markers drawn in a pixel
+    """
+    x_coordinates = np.asarray(x_coordinates, dtype=np.float64)
+    y_coordinates = np.asarray(y_coordinates, dtype=np.float64)
+    display = Displayer(bounding_quadrant(segments, x_coordinates, y_coordinates))
+    origin = np.array(display.min_coordinates)
+    if level_of_detail:
+        step = display.pixel_size / SUBDIVISIONS
+        number = "{{:.{}f}}".format(max(0, int(np.ceil(-np.log10(step)))))
+        lines, dots = thin_segments(segments, origin, display.pixel_size)
+        x_coordinates, y_coordinates = thin_points(x_coordinates, y_coordinates, origin, display.pixel_size, markers_per_pixel)
+    else:
+        number = "{!r}"
+        lines, dots = (segments.x1, segments.y1, segments.x2, segments.y2), ((), ())
+
+    svg_file = display.open_svg(filename)
+    svg_file.write('<g fill="none" stroke="{}">\n'.format(Displayer.svg_colors[0]))
+    write_chunks(svg_file, '<path d="{}"/>\n', "M{0} {0}L{0} {0}".format(number), lines)
+    write_chunks(svg_file, '<path d="{}"/>\n', "M{0} {0}h{1}".format(number, display.pixel_size), dots)
+    svg_file.write('</g>\n')
+    svg_file.write('<g fill="{0}" stroke="{0}">\n'.format(Displayer.svg_colors[1]))
+    write_chunks(svg_file, '{}', '<use xlink:href="#c" x="{0}" y="{0}"/>\n'.format(number), (x_coordinates, y_coordinates))
+    svg_file.write('</g>\n')
+    display.close_svg(svg_file)
+    return len(lines[0]) + len(dots[0]), len(x_coordinates)
+
+
+def write_chunks(svg_file, wrapper, fragment, columns):
+    """
+    write the fragments of given columns of coordinates, CHUNK_SIZE at a time,
+    each chunk being wrapped in wrapper
+    """
+    for start in range(0, len(columns[0]), CHUNK_SIZE):
+        chunk = zip(*(column[start:start+CHUNK_SIZE].tolist() for column in columns))
+        svg_file.write(wrapper.format("".join(fragment.format(*values) for values in chunk)))
+
+
+def thin_segments(segments, origin, pixel_size):
+    """
+    segments to draw at given resolution :
+    - columns x1, y1, x2, y2 of the segments longer than a pixel, rounded to 1/SUBDIVISIONS of pixel
+      and without duplicates
+    - columns x, y of a dot for each pixel holding the middle of a shorter segment
+    """
+    x_1, y_1, x_2, y_2 = segments.x1, segments.y1, segments.x2, segments.y2
+    short = np.hypot(x_2 - x_1, y_2 - y_1) < pixel_size
+    step = pixel_size / SUBDIVISIONS
+    ends = np.stack((x_1[~short], y_1[~short], x_2[~short], y_2[~short]), axis=1) - np.tile(origin, 2)
+    ends = np.unique(np.rint(ends / step).astype(np.int64), axis=0) * step + np.tile(origin, 2)
+    middles = np.stack(((x_1[short] + x_2[short]) / 2, (y_1[short] + y_2[short]) / 2), axis=1)
+    cells, rows = pixels(middles, origin, pixel_size)
+    cells = np.unique(cells)
+    dots = np.stack((cells // rows, cells % rows), axis=1) * pixel_size + origin + (0.0, pixel_size / 2)
+    return tuple(ends.T), tuple(dots.T)
+
+
+def pixels(points, origin, pixel_size):
+    """
+    index of the pixel holding each point (given as a (n, 2) array), column after column,
+    and the number of rows of pixels
+    """
+    cells = np.floor((points - origin) / pixel_size).astype(np.int64)
+    rows = int(cells[:, 1].max()) + 1 if len(cells) else 1
+    return cells[:, 0] * rows + cells[:, 1], rows
+
+
+def thin_points(x_coordinates, y_coordinates, origin, pixel_size, markers_per_pixel):
+    """
+    columns x, y of the points to draw : at most markers_per_pixel points in each pixel
+    """
+    cells, _ = pixels(np.stack((x_coordinates, y_coordinates), axis=1), origin, pixel_size)
+    order = np.argsort(cells, kind='stable')
+    sorted_keys = cells[order]
+    positions = np.arange(len(sorted_keys))
+    firsts = np.maximum.accumulate(np.where(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]], positions, 0)) if len(sorted_keys) else positions
+    kept = np.sort(order[positions - firsts < markers_per_pixel])
+    return x_coordinates[kept], y_coordinates[kept]
+
+
+def save_svg_stream(segments, x_coordinates, y_coordinates, name, level_of_detail=False, markers_per_pixel=1):
+    """
+    save segments and points as ./outputs/name.svg, name being the name of the figure (see bo.test),
+    see write_svg
+    """
+    directory = "./outputs"
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    filename = "{}/{}.svg".format(directory, name)
+    return write_svg(filename, segments, x_coordinates, y_coordinates, level_of_detail, markers_per_pixel)
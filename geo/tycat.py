@@ -6,6 +6,7 @@ import os
 import getpass
 from itertools import cycle
 from geo.quadrant import Quadrant
+from geo.svg_stream import write_svg
 
 
 class Displayer:
@@ -92,6 +93,26 @@ def tycat(*things):
     os.system("tycat {}".format(filename))
 
 
+def tycat_stream(segments, x_coordinates, y_coordinates, level_of_detail=False, markers_per_pixel=1):
+    """
+    graphically displays segments of a SegmentStore and points given by their coordinates arrays,
+    streaming the svg file (see geo.svg_stream.write_svg) : for large scenes.
+    requires the terminology terminal emulator.
+    """
+    print("[", Displayer.file_count, "]")
+
+    user = getpass.getuser()
+    directory = "/tmp/{}".format(user)
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+
+    filename = "{}/{}.svg".format(directory, str(Displayer.file_count).zfill(5))
+    Displayer.file_count += 1
+
+    write_svg(filename, segments, x_coordinates, y_coordinates, level_of_detail, markers_per_pixel)
+    os.system("tycat {}".format(filename))
+
+
 def compute_displays(things):
     """
     compute bounding quadrant and svg strings for all things to display.
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+#pylint: disable=R0914
+#pylint: disable=C0301
+
+"""
+uniform grid algorithm to find the crossings between segments
+each segment is rasterized into the cells of a uniform grid covering the bounding quadrant,
+and only pairs of segments sharing a cell are tested.
+a crossing is reported only by the cell containing it (the reference point rule),
+so pairs sharing several cells are not reported twice.
+"""
+
+
+from time import time, perf_counter
+from math import ceil, sqrt, floor
+from itertools import combinations
+from geo.quadrant import Quadrant
+from helpers import find_crossing
+from timeline import Timeline
+from crossings import Crossings
+from metrics import Metrics
+
+
+class Grid():
+    """
+    Grid Class : uniform grid over the bounding quadrant of a store of segments,
+    with about one cell per segment
+    """
+    def __init__(self, segments):
+        self.quadrant = Quadrant([min(segments.x1.min(), segments.x2.min()), segments.y1.min()],
+                                 [max(segments.x1.max(), segments.x2.max()), segments.y2.max()])
+        width, height = [max_c - min_c for min_c, max_c in zip(*self.quadrant.get_arrays())]
+        if width > 0 and height > 0:
+            self.columns = min(ceil(sqrt(len(segments) * width / height)), len(segments))
+            self.rows = min(ceil(sqrt(len(segments) * height / width)), len(segments))
+        else:
+            self.columns = len(segments) if width > 0 else 1
+            self.rows = len(segments) if height > 0 else 1
+        self.cell_width = width / self.columns or 1.0
+        self.cell_height = height / self.rows or 1.0
+        self.margin = 1e-9 * max(width, height, 1.0) # segments are slightly inflated to avoid missing a cell
+
+    def cell(self, point):
+        """
+        (column, row) of the cell containing a point
+        """
+        x_coordinate, y_coordinate = point
+        column = floor((x_coordinate - self.quadrant.min_coordinates[0]) / self.cell_width)
+        row = floor((y_coordinate - self.quadrant.min_coordinates[1]) / self.cell_height)
+        return min(max(column, 0), self.columns - 1), min(max(row, 0), self.rows - 1)
+
+    def cells(self, segments, segment):
+        """
+        cells crossed by a segment, column by column
+        """
+        (x_1, y_1), (x_2, y_2) = segments.lower(segment), segments.upper(segment)
+        min_x = self.quadrant.min_coordinates[0]
+        left, right = sorted((x_1, x_2))
+        first_column, last_column = self.cell((left - self.margin, 0))[0], self.cell((right + self.margin, 0))[0]
+        slope = float(segments.slope[segment]) # precomputed by the store (infinite for vertical segments)
+        for column in range(first_column, last_column + 1):
+            if x_1 == x_2:
+                bottom, top = y_1, y_2
+            else:
+                # part of the segment inside the column
+                strip_left = max(left, min_x + column * self.cell_width)
+                strip_right = min(right, min_x + (column + 1) * self.cell_width)
+                bottom, top = sorted((y_1 + (strip_left - x_1) * slope, y_1 + (strip_right - x_1) * slope))
+            first_row, last_row = self.cell((0, bottom - self.margin))[1], self.cell((0, top + self.margin))[1]
+            for row in range(first_row, last_row + 1):
+                yield column, row
+
+
+def grid(adjuster, segments, writer=None, metrics=None, profiler=None):
+    """
+    implementation of the uniform grid algorithm
+    - segments = SegmentStore, segments are handled through their indices
+    - writer = if given, the CrossingsWriter the crossings are streamed to, instead of being kept in memory
+    - metrics = if given, the Metrics counting and reporting what the grid does (an event is a cell)
+    - profiler = if given, the Profiler timing each phase of the grid
+    returns the Crossings found and the timeline
+    """
+
+    results = Crossings()
+    if writer is not None:
+        results.stream_to(writer)
+    timeline = Timeline() # This will be useful to observe the time complexity
+    processed = 0         # number of intersections processed so far
+    if metrics is None:
+        metrics = Metrics()
+    if len(segments) < 2:
+        metrics.progress = 1.0
+        metrics.close()
+        timeline.close(processed)
+        return results, timeline
+
+    timed = profiler is not None
+    if timed:
+        clock = perf_counter()
+    uniform_grid = Grid(segments)
+    buckets = {}
+    for segment in range(len(segments)):
+        for cell in uniform_grid.cells(segments, segment):
+            if cell in buckets:
+                buckets[cell].append(segment)
+            else:
+                buckets[cell] = [segment]
+    if timed:
+        clock = profiler.lap('grid : rasterization', clock)
+
+    finished = len(buckets) # This will be useful to report the progress
+    for cells_processed, (cell, bucket) in enumerate(buckets.items(), 1):
+        if time() - timeline.start >= 1200:
+            break
+        metrics.intersection_tests += len(bucket) * (len(bucket) - 1) // 2
+        for segment_1, segment_2 in combinations(bucket, 2):
+            # the cell owning the crossing is the one holding it before snapping : both segments are in it
+            new_intersection = segments.intersection(segment_1, segment_2)
+            if new_intersection is None or uniform_grid.cell(new_intersection) != cell:
+                continue
+            new_intersection = find_crossing(segments, segment_1, segment_2, adjuster)
+            if new_intersection is not None:
+                results.add(segment_1, segment_2, new_intersection)
+                processed += 1
+        timeline.record(processed)
+        metrics.intersections = processed
+        metrics.progress = cells_processed / finished
+        metrics.event()
+        if timed:
+            clock = profiler.lap('grid : cells', clock)
+
+    metrics.close()
+    timeline.close(processed)
+    return results, timeline
@@ -4,105 +4,88 @@
 
 """
 definition of some useful functions
-- nearest_living                :   finds nearest living at the left and the right of a segment
-                                    and is not an endpoint of the said segments
-- angle                         :   clockwise angle % pi between segment and the horizontal
-- living_key                    :   key used to sort segments according to their angle
-                                    and there intersection with a horizontal line defined by a point
-- find_new_event                :   finds new event and updates results and events if necessary
+- living_key                    :   key used to sort segments according to their intersection
+                                    with a horizontal line defined by a point, and their slope
+- find_crossing                 :   finds the crossing of two segments, if it is not one of their endpoints
+- find_new_event                :   finds new event and updates events if necessary
 - get_entries                   :   a parser
-- progress_bar                  :   displays a progress bar in the console
 """
 
-import sys
-from math import pi, atan2
 from pathlib import Path
 import argparse
 import re
-from geo.point import Point
-from geo.segment import Segment
+from geo.orientation import orientation
 
-def nearest_living(segment, living):
+def living_key(segments, segment, current_point, through=()):
     """
-    finds nearest living at the left and the right of a segment
+    key used to sort segments on the sweep line at the height of current_point :
+    x coordinate where they cross it, then inverse slope.
+    the x coordinate is not snapped : the adjuster would remember every x coordinate compared,
+    and snap the crossings found later to them.
+    - through = segments going through current_point : they are given its x coordinate
+      (the x coordinate computed from the segment would be off by rounding errors)
     """
-    index = living.index(segment)
-    try:
-        assert index < len(living) - 1
-        right_segment = living[index + 1]
-    except (IndexError, AssertionError):
-        right_segment = None
-    try:
-        assert index > 0
-        left_segment = living[index - 1]
-    except (IndexError, AssertionError):
-        left_segment = None
-    return left_segment, right_segment
-
-def angle(segment, adjuster):
-    """
-    clockwise angle % pi between segment and the horizontal
-    """
-    #we start by calculating the coordinates of the vector direction of the segment
-    x_coordinate = segment.endpoints[0].coordinates[0] - segment.endpoints[1].coordinates[0]
-    y_coordinate = segment.endpoints[0].coordinates[1] - segment.endpoints[1].coordinates[1]
-    point = Point([x_coordinate, y_coordinate])
-    point = adjuster.hash_point(point)
-    [x_coordinate, y_coordinate] = point.coordinates
-    atan2_angle = atan2(y_coordinate, x_coordinate)
-    if atan2_angle >= 0:
-        return pi - atan2_angle
-    else:
-        return - atan2_angle
-
-def living_key(segment, current_point, adjuster):
+    if segment in through:
+        return (current_point[0], segments.columns[4][segment])
+    return segments.key_at(segment, current_point[1])
+
+
+def find_crossing(segments, segment_1, segment_2, adjuster):
     """
-    key
+    finds the crossing of two segments, snapped by the adjuster.
+    returns None if they don't cross or if they cross at one of their endpoints
     """
-    point = Point([current_point.coordinates[0] + 10, current_point.coordinates[1]])
-    other_point = Point([current_point.coordinates[0] - 10, current_point.coordinates[1]])
-    swipe_line = Segment([point, other_point])
-    intersection = segment.line_intersection_with(swipe_line)
-    intersection = adjuster.hash_point(intersection)
-
-    if intersection.coordinates[0] < current_point.coordinates[0]:
-        return(intersection.coordinates[0], angle(segment, adjuster))
-    else:
-        return(intersection.coordinates[0], angle(segment, adjuster))
+    new_intersection = segments.intersection(segment_1, segment_2)
+    if new_intersection is None:
+        return None
+    # compared once snapped, like naive does : a crossing a rounding error away
+    # from an endpoint is that endpoint
+    new_intersection = adjuster.hash_coordinates(new_intersection)
+    endpoints = (segments.lower(segment_1), segments.upper(segment_1),
+                 segments.lower(segment_2), segments.upper(segment_2))
+    if new_intersection in endpoints:
+        return None
+    return new_intersection
 
 
-def find_new_event(segment_1, segment_2, current_point, events, results, adjuster):
+def find_new_event(segments, segment_1, segment_2, current_point, events, adjuster, cache=None, late=None, reported=None, ending=()):
     """
-    finds new event and updates results and events if necessary
+    finds new event and updates events if necessary
+    - segment_1, segment_2 = neighbours on the sweep line, segment_1 being at the left of segment_2
+    - current_point = point of the event being processed : only crossings after it are scheduled
+    - cache = if given, the CrossingsCache remembering the pairs already tested
+    - late = if given, the list the crossings still to come but snapped at or before current_point
+      are appended to, as (segment_1, segment_2, point, True) : the sweep handles them at once
+    - reported = if given (with late), the ReportedPairs of the sweep : a crossing behind the sweep line
+      which was never reported has been missed (the order of the segments was decided on snapped coordinates,
+      as if they had crossed). it is appended to late as (segment_1, segment_2, point, False)
+    - ending = segments leaving the sweep line at current_point : their crossings still to come
+      were snapped after their upper endpoint, they are late too
     """
-    if segment_1 is None or segment_2 is None:
-        return None
-    else:
-        new_intersection = segment_1.intersection_with(segment_2)
-        if new_intersection is not None and new_intersection not in segment_1.endpoints + segment_2.endpoints:
-            new_intersection = adjuster.hash_point(new_intersection)
-            if new_intersection.coordinates[1] > current_point.coordinates[1]:
-                # this condition is used to exclude crossings that have already been found
-                events.add_event(new_intersection, [segment_1, segment_2], [], [], [])
-                for segment in [segment_1, segment_2]:
-                    if segment in results:
-                        results[segment] += [new_intersection]
-                    else:
-                        results[segment] = [new_intersection]
-            elif segment_1.endpoints[0].coordinates[1] == segment_1.endpoints[1].coordinates[1]:
-                # this means 'segment' is in 'horizontal'
-                for segment in [segment_1, segment_2]:
-                    if segment in results:
-                        results[segment] += [new_intersection]
-                    else:
-                        results[segment] = [new_intersection]
+    if segment_1 is not None and segment_2 is not None:
+        if cache is not None:
+            new_intersection = cache.crossing(segments, segment_1, segment_2, adjuster)
         else:
-            return None
+            new_intersection = find_crossing(segments, segment_1, segment_2, adjuster)
+        # the crossing is still to come if segment_1 ends at the right of segment_2 (else it has been found).
+        # it is scheduled if it lies after the current point (in y, then x order) : a crossing snapped
+        # at or before it would be popped again at once, swapping its segments back and forth
+        if new_intersection is None:
+            return
+        if orientation(*segments.lower(segment_2), *segments.upper(segment_2), *segments.upper(segment_1)) < 0:
+            if new_intersection[::-1] > current_point[::-1] and segment_1 not in ending and segment_2 not in ending:
+                events.add_event(new_intersection, [segment_1, segment_2])
+            elif late is not None:
+                late.append((segment_1, segment_2, new_intersection, True))
+        elif late is not None and reported is not None and (segment_1, segment_2) not in reported:
+            late.append((segment_1, segment_2, new_intersection, False))
 
 
 def get_entries():
     """
     parser
+    returns the options of bo.test (as a dict of its keyword arguments), whether the statistics are logged,
+    the number of jobs and the filepaths
     """
     def bo_file(filepath):
         """
@@ -119,21 +102,67 @@ def get_entries():
 
     parser.add_argument('-s', action='store_true', help='save the results as svg in ./outputs', default=False)
     parser.add_argument('-t', action='store_true', help='tycat the results', default=False)
+    parser.add_argument('-d', dest='density', action='store_true', help='save a density map of the intersections in ./outputs/file.density.png (or .npy, see --density-format)', default=False)
+    parser.add_argument('--density-format', dest='density_format', choices=['png', 'npy'], help='format of the density map : png heatmap or npy counts', default='png')
+    parser.add_argument('--density-size', dest='density_size', type=int, nargs=2, metavar=('WIDTH', 'HEIGHT'), help='number of pixels of the density map', default=(800, 600))
+    parser.add_argument('--density-segments', dest='density_segments', action='store_true', help='also map the number of segments going through each pixel', default=False)
     parser.add_argument('-l', action='store_true', help='add results to a log.csv file', default=False)
+    parser.add_argument('-c', action='store_true', help='write the crossings found next to each file (file.crossings, see crossings.py)', default=False)
+    parser.add_argument('--thin', action='store_true', help='thin the svg (-s, -t) to the resolution of the image : merge segments shorter than a pixel, draw few intersections per pixel', default=False)
+    parser.add_argument('--thin-markers', dest='markers', type=int, help='intersections drawn per pixel at most, with --thin', default=1)
+    parser.add_argument('--no-compare', dest='compare', action='store_false', help='only run the engine : no naive algorithm nor timeline plot (faster start)', default=True)
+    parser.add_argument('--verify', action='store_true', help='instead of running the naive algorithm, check the crossings found against brute force on a sample (estimated recall and precision)', default=False)
+    parser.add_argument('--verify-mode', dest='verify_mode', choices=['strips', 'pairs'], help='sample checked with --verify : random horizontal strips or random pairs of segments', default='strips')
+    parser.add_argument('--verify-samples', dest='verify_samples', type=int, help='number of strips (8 by default) or of pairs (10000 by default) checked', default=None)
+    parser.add_argument('-e', '--engine', dest='engine', choices=['bo', 'grid', 'parallel'], help='algorithm used to find the crossings (bentley ottmann, uniform grid or bentley ottmann on parallel slabs)', default='bo')
+    parser.add_argument('--checkpoint', action='store_true', help='save the state of the sweep next to each file (file.bo.checkpoint) from time to time', default=False)
+    parser.add_argument('--checkpoint-interval', dest='interval', type=float, help='seconds between two checkpoints', default=300)
+    parser.add_argument('--budget', type=float, help='stop the sweep after this many seconds, saving a checkpoint', default=None)
+    parser.add_argument('--resume', action='store_true', help='resume the sweep from the checkpoint of each file, if there is one', default=False)
+    parser.add_argument('--report', choices=['progress', 'json', 'none'], help='how the metrics of the engine (and of the naive algorithm) are reported : progress bar, json lines or nothing', default='progress')
+    parser.add_argument('--report-interval', dest='report_interval', type=float, help='seconds between two reports', default=0.2)
+    parser.add_argument('--profile', action='store_true', help='print the time spent in each phase of the engine', default=False)
+    parser.add_argument('--profile-dump', dest='profile_dump', action='store_true', help='also save the statistics of cProfile in ./outputs/file.pstats', default=False)
+    parser.add_argument('-j', dest='jobs', type=int, help='number of files processed in parallel (batch mode)', default=1)
     parser.add_argument(dest='filepaths', nargs='+', type=bo_file, help='filepaths of the .bo files to analyse')
 
-    bool_save, bool_tycat, bool_log, filepaths = parser.parse_args().s, parser.parse_args().t, parser.parse_args().l, parser.parse_args().filepaths
+    arguments = parser.parse_args()
+    bool_save, bool_tycat, bool_log, bool_crossings, engine, filepaths = arguments.s, arguments.t, arguments.l, arguments.c, arguments.engine, arguments.filepaths
+    thinning = arguments.markers if arguments.thin else None
+    checkpoint_options = None
+    if arguments.checkpoint or arguments.budget is not None or arguments.resume:
+        if engine != 'bo':
+            parser.error('--checkpoint, --budget and --resume only apply to the bo engine')
+        checkpoint_options = {'interval': arguments.interval if arguments.checkpoint else None,
+                              'budget': arguments.budget, 'resume': arguments.resume}
 
-    return bool_save, bool_tycat, bool_log, filepaths
+    density_options = None
+    if arguments.density:
+        if min(arguments.density_size) < 1:
+            parser.error('--density-size needs at least one pixel in each direction')
+        density_options = {'file_format': arguments.density_format, 'width': arguments.density_size[0],
+                           'height': arguments.density_size[1], 'with_segments': arguments.density_segments}
 
-def progress_bar(events_left, finished):
-    """
-    displays a progress bar in the console
-    """
-    sys.stdout.write('\r')
-    if events_left > finished:
-        finished = events_left
-    step = int((finished - events_left)/finished*100)
-    print("   [{}{}] {}%".format('='*(step//4), ' '*(25-step//4), step), end='', flush=True)
-    if step == 100:
-        print("\n")
+    verification_options = None
+    if arguments.verify:
+        if arguments.verify_samples is not None and arguments.verify_samples < 1:
+            parser.error('--verify-samples needs at least one sample')
+        verification_options = {'mode': arguments.verify_mode, 'samples': arguments.verify_samples}
+    compare = arguments.compare and verification_options is None
+
+    reporting = (arguments.report, arguments.report_interval)
+    profiling = 'dump' if arguments.profile_dump else 'table' if arguments.profile else None
+
+    if arguments.markers < 1:
+        parser.error('--thin-markers needs at least one intersection per pixel')
+    if arguments.jobs > 1 and bool_tycat:
+        parser.error('-t cannot display the results of files processed in parallel (-j)')
+    if engine == 'parallel' and profiling is not None:
+        parser.error('--profile and --profile-dump cannot see the slabs of the parallel engine, swept in other processes')
+    if arguments.jobs > 1 and profiling == 'table':
+        parser.error('--profile cannot print the phases of files processed in parallel (-j), use --profile-dump')
+
+    options = {'bool_save': bool_save, 'bool_tycat': bool_tycat, 'engine': engine, 'checkpoint_options': checkpoint_options,
+               'reporting': reporting, 'profiling': profiling, 'bool_crossings': bool_crossings, 'thinning': thinning,
+               'density_options': density_options, 'compare': compare, 'verification_options': verification_options}
+    return options, bool_log, arguments.jobs, filepaths
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the Living class
+Living objects hold the segments crossing the sweep line, ordered from left to right.
+They are treaps : binary search trees on the sweep line order, balanced by random priorities,
+so that insert, remove, swap and neighbours all run in O(log n),
+and between (segments in a range of the sweep line) in O(log n + k)
+"""
+
+from random import Random
+
+class Node():
+    """
+    Node of the treap, holding one living segment
+    """
+    __slots__ = ('segment', 'priority', 'left', 'right', 'parent')
+
+    def __init__(self, segment, parent, priority):
+        self.segment = segment
+        self.priority = priority
+        self.left = None
+        self.right = None
+        self.parent = parent
+
+class Living():
+    """
+    Living Class
+    """
+    def __init__(self):
+        self.root = None                  # root of the treap
+        self.nodes = {}                   # mapping of segments to nodes
+        self.random = Random(0)           # seeded priorities : sweeps (and resumed sweeps) are reproducible
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __contains__(self, segment):
+        return segment in self.nodes
+
+    def __iter__(self):
+        """
+        iterates over the living segments from left to right
+        """
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.segment
+            node = node.right
+
+    def insert(self, segment, key):
+        """
+        Inserts a segment at its place on the sweep line
+        - key = function giving the position of a segment on the sweep line
+        Segments with equal keys are inserted to the right of the existing ones
+        """
+        segment_key = key(segment)
+        parent, node, on_the_left = None, self.root, False
+        while node is not None:
+            parent = node
+            on_the_left = segment_key < key(node.segment)
+            node = node.left if on_the_left else node.right
+
+        node = Node(segment, parent, self.random.random())
+        self.nodes[segment] = node
+        if parent is None:
+            self.root = node
+        elif on_the_left:
+            parent.left = node
+        else:
+            parent.right = node
+
+        while node.parent is not None and node.parent.priority > node.priority:
+            self._rotate_up(node)
+
+    def remove(self, segment):
+        """
+        Removes a segment from the sweep line. Raises KeyError if it is not living
+        """
+        node = self.nodes.pop(segment)
+        while node.left is not None and node.right is not None:
+            if node.left.priority < node.right.priority:
+                self._rotate_up(node.left)
+            else:
+                self._rotate_up(node.right)
+        child = node.left if node.left is not None else node.right
+        self._replace(node, child)
+
+    def swap(self, segment_1, segment_2):
+        """
+        Exchanges the places of two living segments (when they cross each other)
+        """
+        node_1, node_2 = self.nodes[segment_1], self.nodes[segment_2]
+        node_1.segment, node_2.segment = segment_2, segment_1
+        self.nodes[segment_1], self.nodes[segment_2] = node_2, node_1
+
+    def neighbours(self, segment):
+        """
+        finds nearest living at the left and the right of a segment
+        """
+        node = self.nodes[segment]
+        left_node, right_node = self._predecessor(node), self._successor(node)
+        left_segment = left_node.segment if left_node is not None else None
+        right_segment = right_node.segment if right_node is not None else None
+        return left_segment, right_segment
+
+    def between(self, low, high, position):
+        """
+        iterates from left to right over the living segments whose position on the sweep line
+        is within [low, high]
+        - position = function giving the x coordinate of a segment on the sweep line
+        """
+        first, node = None, self.root
+        while node is not None:
+            if position(node.segment) >= low:
+                first, node = node, node.left
+            else:
+                node = node.right
+        node = first
+        while node is not None and position(node.segment) <= high:
+            yield node.segment
+            node = self._successor(node)
+
+    def _predecessor(self, node):
+        """
+        node just at the left of the given one
+        """
+        if node.left is not None:
+            node = node.left
+            while node.right is not None:
+                node = node.right
+            return node
+        while node.parent is not None and node.parent.left is node:
+            node = node.parent
+        return node.parent
+
+    def _successor(self, node):
+        """
+        node just at the right of the given one
+        """
+        if node.right is not None:
+            node = node.right
+            while node.left is not None:
+                node = node.left
+            return node
+        while node.parent is not None and node.parent.right is node:
+            node = node.parent
+        return node.parent
+
+    def _replace(self, node, child):
+        """
+        puts child (possibly None) at the place of node in the tree
+        """
+        parent = node.parent
+        if child is not None:
+            child.parent = parent
+        if parent is None:
+            self.root = child
+        elif parent.left is node:
+            parent.left = child
+        else:
+            parent.right = child
+
+    def _rotate_up(self, node):
+        """
+        rotates the tree so that node takes the place of its parent
+        """
+        parent = node.parent
+        self._replace(parent, node)
+        if parent.left is node:
+            parent.left = node.right
+            if node.right is not None:
+                node.right.parent = parent
+            node.right = parent
+        else:
+            parent.right = node.left
+            if node.left is not None:
+                node.left.parent = parent
+            node.left = parent
+        parent.parent = node
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the Metrics class and of its reporters
+Metrics objects count what happens during a run of an engine (events, intersection tests, intersections)
+and watch the structures of a sweep (sizes of the event heap and of the living segments, crossings cache).
+engines without event queue count their own events (cells of grid, tiles of naive, slabs of parallel)
+and set the fraction of their work done.
+a reporter displays them, at most once per interval of wall clock time :
+- ProgressBar                   :   a progress bar with the main numbers, in the console
+- JsonLines                     :   one json object per report, for other programs (on stderr)
+- None                          :   nothing, counting stays almost free
+"""
+
+import json
+import sys
+from time import time
+
+CHECK_STRIDE = 128 # the clock is only read every CHECK_STRIDE events
+
+
+class Metrics():
+    """
+    Metrics Class
+    - reporter = object with report(snapshot) and close(snapshot) methods, or None
+    - interval = minimum time between two reports, in seconds
+    """
+    def __init__(self, reporter=None, interval=0.2):
+        self.reporter = reporter
+        self.interval = interval
+        self.start = time()
+        self.last_report = self.start
+        self.events_at_last_report = 0
+        self.stride = CHECK_STRIDE        # events between two readings of the clock
+        self.next_check = CHECK_STRIDE if reporter is not None else float('inf')
+        self.events = 0                   # events processed
+        self.intersection_tests = 0       # pairs of segments tested
+        self.intersections = 0            # crossings found
+        self.living_max = 0               # maximum number of living segments
+        self.progress = None              # fraction of the work done, for engines without event queue
+        self.watched_events = None        # event queue, living segments and crossings cache of the sweep
+        self.watched_living = None
+        self.watched_cache = None
+
+    def watch(self, events, living, cache=None):
+        """
+        gives the structures of the sweep which are reported
+        """
+        self.watched_events, self.watched_living, self.watched_cache = events, living, cache
+
+    def check_every(self, stride):
+        """
+        reads the clock every stride events from now on (1 for engines with few long events)
+        """
+        self.stride = stride
+        if self.reporter is not None:
+            self.next_check = self.events + stride
+
+    def event(self, living_size=0, count=1):
+        """
+        counts an event, the sweep line holding living_size segments after it.
+        reports if it is time to
+        - count = events processed at once (the ones of a slab of parallel)
+        """
+        self.events += count
+        if living_size > self.living_max:
+            self.living_max = living_size
+        if self.events >= self.next_check:
+            self.next_check = self.events + self.stride
+            now = time()
+            if now - self.last_report >= self.interval:
+                self.reporter.report(self.snapshot(now))
+                self.last_report, self.events_at_last_report = now, self.events
+
+    def snapshot(self, now=None):
+        """
+        all the numbers, as a dict
+        """
+        if now is None:
+            now = time()
+        elapsed = now - self.start
+        since_last_report = now - self.last_report
+        events, living, cache = self.watched_events, self.watched_living, self.watched_cache
+        return {'elapsed': elapsed,
+                'events': self.events,
+                'events_per_second': (self.events - self.events_at_last_report) / since_last_report if since_last_report > 0 else 0.0,
+                'progress': events.progress() if events is not None else self.progress,
+                'heap': len(events.heap) if events is not None else None,
+                'living': len(living) if living is not None else None,
+                'living_max': self.living_max,
+                'intersection_tests': self.intersection_tests,
+                'intersections': self.intersections,
+                'hit_ratio': self.intersections / self.intersection_tests if self.intersection_tests else 0.0,
+                'cache': len(cache) if cache is not None else None,
+                'cache_hits': cache.hits if cache is not None else None,
+                'cache_misses': cache.misses if cache is not None else None,
+                'cache_hit_ratio': cache.hit_ratio() if cache is not None else None}
+
+    def close(self):
+        """
+        last report, whatever the time
+        """
+        if self.reporter is not None:
+            self.reporter.close(self.snapshot())
+
+
+class ProgressBar():
+    """
+    ProgressBar Class : reports in the console, on a single line
+    """
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stdout
+
+    def report(self, snapshot):
+        """
+        redraws the progress bar
+        """
+        step = int((snapshot['progress'] or 0.0) * 100)
+        sweep = "   living {} (max {})   heap {}".format(snapshot['living'], snapshot['living_max'], snapshot['heap']) if snapshot['living'] is not None else ""
+        cache = "   cache hits {:.0%}".format(snapshot['cache_hit_ratio']) if snapshot['cache_hit_ratio'] is not None else ""
+        self.stream.write("\r   [{}{}] {}%   {:.0f} events/s{}   intersections {}{}  ".format(
+            '='*(step//4), ' '*(25-step//4), step, snapshot['events_per_second'], sweep, snapshot['intersections'], cache))
+        self.stream.flush()
+
+    def close(self, snapshot):
+        """
+        draws the final progress bar
+        """
+        self.report(snapshot)
+        self.stream.write("\n\n")
+        self.stream.flush()
+
+
+class JsonLines():
+    """
+    JsonLines Class : reports one json object per line (on the error output by default,
+    so that it does not mix with the results)
+    """
+    def __init__(self, stream=None):
+        self.stream = stream if stream is not None else sys.stderr
+
+    def report(self, snapshot):
+        """
+        writes the snapshot as a line of json
+        """
+        self.stream.write(json.dumps(snapshot) + "\n")
+        self.stream.flush()
+
+    def close(self, snapshot):
+        """
+        writes the last snapshot
+        """
+        self.report(snapshot)
+
+
+REPORTERS = {'progress': ProgressBar, 'json': JsonLines, 'none': None}
+
+
+def metrics_for(reporter_name, interval=0.2):
+    """
+    Metrics with the reporter of given name (see REPORTERS)
+    """
+    reporter = REPORTERS[reporter_name]
+    return Metrics(reporter() if reporter is not None else None, interval)
@@ -4,42 +4,142 @@
 
 """
 naive algorithm to find the crossigs between segments
+all pairs of segments are tested, a tile of pairs at a time, with numpy broadcasting
 """
 
 
 from time import time
-from itertools import combinations
-from scipy import special
-from helpers import progress_bar
+from math import comb
+import numpy as np
+from geo.orientation import orientations
+from timeline import Timeline
+from crossings import Crossings
+from metrics import Metrics
 
+TILE_SIZE = 512 # a tile holds TILE_SIZE x TILE_SIZE pairs of segments
 
-def naive(adjuster, segments):
+
+def naive(adjuster, segments, tile_size=TILE_SIZE, writer=None, metrics=None):
     """
-    implementation of the naive algorithl to find crossing
+    implementation of the naive algorithm to find crossing
     between segments
+    - segments = SegmentStore
+    - tile_size = number of segments on each side of a tile, memory used is O(tile_size²)
+    - writer = if given, the CrossingsWriter the crossings are streamed to, instead of being kept in memory
+    - metrics = if given, the Metrics counting and reporting what naive does (an event is a tile)
+    returns the Crossings found and the timeline
+    """
+
+    crossings = Crossings()
+    if writer is not None:
+        crossings.stream_to(writer)
+    timeline = Timeline() # This will be useful to observe the time complexity
+    finished = comb(len(segments), 2) # This will be useful to report the progress
+    pairs_processed = 0
+    if metrics is None:
+        metrics = Metrics()
+    metrics.check_every(1)
+
+    for block_1, block_2 in tiles(len(segments), tile_size):
+        if time() - timeline.start >= 1200:
+            break
+        for segment_1, segment_2, new_intersection in snapped_crossings(adjuster, segments, *tile_intersections(segments, block_1, block_2)):
+            crossings.add(segment_1, segment_2, new_intersection)
+        if block_1 == block_2:
+            pairs_processed += comb(block_1.stop - block_1.start, 2)
+        else:
+            pairs_processed += (block_1.stop - block_1.start) * (block_2.stop - block_2.start)
+        timeline.record(len(crossings))
+        metrics.intersection_tests, metrics.intersections = pairs_processed, len(crossings)
+        metrics.progress = pairs_processed / finished
+        metrics.event()
+
+    metrics.progress = 1.0 # also when there is no pair to test
+    metrics.close()
+    timeline.close(len(crossings))
+    return crossings, timeline
+
+
+def tiles(size, tile_size):
+    """
+    slices of segments indices covering every pair (i < j) once
+    """
+    blocks = [slice(start, min(start + tile_size, size)) for start in range(0, size, tile_size)]
+    for position, block_1 in enumerate(blocks):
+        for block_2 in blocks[position:]:
+            yield block_1, block_2
+
+
+def snapped_crossings(adjuster, segments, indices_1, indices_2, x_coordinates, y_coordinates):
+    """
+    snaps intersections (arrays i, j, x, y) through the adjuster and drops the ones at an endpoint
+    of their segments : yields the crossings (i, j, (x, y))
+    """
+    for segment_1, segment_2, x_coordinate, y_coordinate in zip(indices_1.tolist(), indices_2.tolist(), x_coordinates.tolist(), y_coordinates.tolist()):
+        new_intersection = adjuster.hash_coordinates((x_coordinate, y_coordinate))
+        endpoints = (segments.lower(segment_1), segments.upper(segment_1),
+                     segments.lower(segment_2), segments.upper(segment_2))
+        if new_intersection not in endpoints:
+            yield segment_1, segment_2, new_intersection
+
+
+def pair_intersections(segments, indices_1, indices_2):
+    """
+    intersects segments indices_1[k] and indices_2[k] for each k (arrays of indices).
+    returns arrays (i, j, x, y) of intersecting pairs, like tile_intersections
+    """
+    columns = (segments.x1, segments.y1, segments.x2, segments.y2)
+    start_x, start_y, end_x, end_y = [column[indices_1] for column in columns]
+    other_x, other_y, other_end_x, other_end_y = [column[indices_2] for column in columns]
+    side_1 = orientations(start_x, start_y, end_x, end_y, other_x, other_y)
+    side_2 = orientations(start_x, start_y, end_x, end_y, other_end_x, other_end_y)
+    candidates = side_1 != side_2
+    return straddling_intersections(segments, indices_1[candidates], indices_2[candidates], side_1[candidates], side_2[candidates])
+
+
+def tile_intersections(segments, block_1, block_2):
+    """
+    intersects every segment of block_1 with every segment of block_2
+    (same orientation tests as SegmentStore.intersection).
+    returns arrays (i, j, x, y) of intersecting pairs, with i < j
+    """
+    side_1 = orientations(segments.x1[block_1, None], segments.y1[block_1, None],
+                          segments.x2[block_1, None], segments.y2[block_1, None],
+                          segments.x1[None, block_2], segments.y1[None, block_2])
+    side_2 = orientations(segments.x1[block_1, None], segments.y1[block_1, None],
+                          segments.x2[block_1, None], segments.y2[block_1, None],
+                          segments.x2[None, block_2], segments.y2[None, block_2])
+    candidates = side_1 != side_2
+    if block_1 == block_2:
+        candidates &= np.triu(np.ones(candidates.shape, dtype=bool), 1)
+
+    rows, columns = np.nonzero(candidates)
+    return straddling_intersections(segments, rows + block_1.start, columns + block_2.start, side_1[rows, columns], side_2[rows, columns])
+
+
+def straddling_intersections(segments, indices_1, indices_2, side_1, side_2):
+    """
+    intersections of pairs (arrays i, j) where segment j straddles the line of segment i,
+    side_1 and side_2 being the orientations of the endpoints of j with respect to i.
+    returns arrays (i, j, x, y) of intersecting pairs
     """
+    # the other segment straddles the line of the first one : test the other way on candidates only
+    start_x, start_y, end_x, end_y = [column[indices_1] for column in (segments.x1, segments.y1, segments.x2, segments.y2)]
+    other_x, other_y, other_end_x, other_end_y = [column[indices_2] for column in (segments.x1, segments.y1, segments.x2, segments.y2)]
+    other_side_1 = orientations(other_x, other_y, other_end_x, other_end_y, start_x, start_y)
+    other_side_2 = orientations(other_x, other_y, other_end_x, other_end_y, end_x, end_y)
+    found = other_side_1 != other_side_2
+    indices_1, indices_2 = indices_1[found], indices_2[found]
+    side_1, side_2, other_side_1, other_side_2 = side_1[found], side_2[found], other_side_1[found], other_side_2[found]
+    start_x, start_y, end_x, end_y = start_x[found], start_y[found], end_x[found], end_y[found]
+    other_x, other_y, other_end_x, other_end_y = other_x[found], other_y[found], other_end_x[found], other_end_y[found]
 
-    results = {}
-    graph = [[0], [0]] # This will be useful to observe the time complexity
-    start = time()
-    finished = special.binom(len(segments), 2) # This will be useful to print a progress bar in the console
-    segments_processed = 0
-
-    for segment_1, segment_2 in combinations(segments, 2):
-        if time() - start >= 1200:
-            return results, graph
-        new_intersection = segment_1.intersection_with(segment_2)
-        if new_intersection is not None:
-            new_intersection = adjuster.hash_point(new_intersection)
-            if new_intersection not in segment_1.endpoints + segment_2.endpoints:
-                for segment in [segment_1, segment_2]:
-                    if segment in results:
-                        results[segment] += [new_intersection]
-                    else:
-                        results[segment] = [new_intersection]
-        segments_processed += 1
-        graph[0] += [time() - start]
-        graph[1] += [len(list(set().union(*results.values())))]
-        progress_bar(finished - segments_processed, finished)
-
-    return results, graph
+    # intersection of the lines, or exact endpoint when a segment only touches the other
+    direction_x, direction_y = end_x - start_x, end_y - start_y
+    other_direction_x, other_direction_y = other_end_x - other_x, other_end_y - other_y
+    denominator = direction_x * other_direction_y - direction_y * other_direction_x
+    alpha = ((other_x - start_x) * other_direction_y - (other_y - start_y) * other_direction_x) / denominator
+    touching = [side_1 == 0, side_2 == 0, other_side_1 == 0, other_side_2 == 0]
+    x_coordinates = np.select(touching, [other_x, other_end_x, start_x, end_x], start_x + direction_x * alpha)
+    y_coordinates = np.select(touching, [other_y, other_end_y, start_y, end_y], start_y + direction_y * alpha)
+    return indices_1, indices_2, x_coordinates, y_coordinates
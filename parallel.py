@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+#pylint: disable=R0914
+#pylint: disable=C0301
+
+"""
+multi-process Bentley Ottmann algorithm
+the plane is cut into horizontal slabs holding about the same number of events,
+and an independent sweep runs on each slab in a worker process.
+- slab boundaries are placed between endpoints heights : no event lies on a boundary
+- each slab sweeps (low - margin, high + margin], margin being the snapping step :
+  a crossing near a boundary is snapped differently in each slab, it is found by one of them at least.
+  crossings found by both slabs are merged once : the pairs crossing near boundaries are remembered
+"""
+
+import os
+from os import getpid
+from concurrent.futures import ProcessPoolExecutor
+from resource import getrusage, RUSAGE_SELF
+import numpy as np
+from geo.coordinates_hash import CoordinatesHash
+from geo.segment_store import SegmentStore
+from timeline import Timeline
+from crossings import Crossings
+from metrics import Metrics
+
+SEGMENTS_PER_SLAB = 2000 # slabs with fewer segments are not worth a process
+
+
+def usable_processors():
+    """
+    number of processors this process may run on (its affinity, where the system tells it,
+    which is less than cpu_count in a container or under taskset)
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def slab_boundaries(segments, slabs=None):
+    """
+    heights cutting the plane into slabs with balanced numbers of events.
+    the number of slabs is chosen from the number of segments and processors if not given.
+    boundaries lie halfway between two distinct endpoints heights.
+    """
+    if slabs is None:
+        slabs = min(usable_processors(), len(segments) // SEGMENTS_PER_SLAB)
+    heights = np.sort(np.concatenate((segments.y1, segments.y2)))
+    distinct_heights = np.unique(heights)
+    boundaries = set()
+    for slab in range(1, max(slabs, 1)):
+        position = np.searchsorted(distinct_heights, heights[slab * len(heights) // slabs])
+        if position + 1 < len(distinct_heights):
+            boundaries.add((distinct_heights[position] + distinct_heights[position + 1]) / 2)
+    return sorted(boundaries)
+
+
+def slab_coordinates(segments, low, high):
+    """
+    indices and coordinates of segments crossing (low, high].
+    segments are not cut : the sweep of the slab starts at its lower boundary,
+    so that crossings are computed from the original coordinates.
+    """
+    indices = np.nonzero((segments.y2 > low) & (segments.y1 <= high))[0]
+    return indices, np.stack((segments.x1[indices], segments.y1[indices],
+                              segments.x2[indices], segments.y2[indices]), axis=1)
+
+
+def sweep_slab(coordinates, low, high):
+    """
+    runs bentley ottmann on the segments crossing (low, high] (in a worker process).
+    returns the crossings in (low, high] as (segment a, segment b, x, y), segments being local indices,
+    the number of events processed, and the worker process with its peak resident set size (in bytes)
+    """
+    # pylint: disable=import-outside-toplevel
+    from bo import iter_intersections  # bo imports us
+    adjuster = CoordinatesHash()
+    adjuster.hash_array(coordinates)
+    since = low if low > -np.inf else None
+    crossings = []
+    metrics = Metrics()
+    for segment_1, segment_2, (x_coordinate, y_coordinate) in iter_intersections(adjuster, SegmentStore(coordinates), since, high, metrics=metrics):
+        if low < y_coordinate <= high:
+            crossings.append((segment_1, segment_2, x_coordinate, y_coordinate))
+    return crossings, metrics.events, (getpid(), getrusage(RUSAGE_SELF).ru_maxrss * 1024) # kilobytes on linux
+
+
+def parallel_bentley_ottmann(adjuster, segments, slabs=None, workers=None, writer=None, metrics=None):
+    """
+    implementation of the slab-partitioned Bentley Ottmann algorithm
+    - segments = SegmentStore, segments are handled through their indices
+    - slabs = number of slabs (chosen automatically if None)
+    - workers = number of processes (one per usable processor, and at most one per slab, if None)
+    - writer = if given, the CrossingsWriter the crossings are streamed to, instead of being kept in memory
+    - metrics = if given, the Metrics counting and reporting the events of the slabs, as they are merged
+    """
+    boundaries = [-np.inf] + slab_boundaries(segments, slabs) + [np.inf]
+    if len(boundaries) == 2:
+        # pylint: disable=import-outside-toplevel
+        from bo import bentley_ottmann
+        return bentley_ottmann(adjuster, segments, metrics=metrics, writer=writer)
+    if metrics is None:
+        metrics = Metrics()
+    metrics.check_every(1)
+
+    results = Crossings()
+    if writer is not None:
+        results.stream_to(writer)
+    timeline = Timeline() # This will be useful to observe the time complexity
+    with ProcessPoolExecutor(max_workers=workers or min(usable_processors(), len(boundaries) - 1)) as executor:
+        tasks = []
+        margin = 1 / adjuster.scale
+        for low, high in zip(boundaries, boundaries[1:]):
+            indices, coordinates = slab_coordinates(segments, low - margin, high + margin)
+            tasks.append((executor.submit(sweep_slab, coordinates, low - margin, high + margin), low, high, indices))
+        near_boundaries = set() # pairs crossing within two steps of a boundary : they may be found by both slabs
+        workers_memory = {}     # peak resident set size of each worker process
+        for merged, (task, low, high, indices) in enumerate(tasks, 1): # merged in slab order, so that the adjuster hashes points in a fixed order
+            crossings, events, (worker, memory) = task.result()
+            workers_memory[worker] = max(memory, workers_memory.get(worker, 0))
+            for segment_1, segment_2, x_coordinate, y_coordinate in crossings:
+                pair = (int(indices[segment_1]), int(indices[segment_2]))
+                if not low + 2 * margin < y_coordinate <= high - 2 * margin:
+                    if pair in near_boundaries:
+                        continue
+                    near_boundaries.add(pair)
+                results.add(*pair, adjuster.hash_coordinates((x_coordinate, y_coordinate)))
+            timeline.record(len(results), events)
+            metrics.intersections = len(results)
+            metrics.progress = merged / len(tasks)
+            metrics.event(count=events)
+
+    metrics.close()
+    timeline.workers_memory = sum(workers_memory.values())
+    timeline.close(len(results))
+    return results, timeline
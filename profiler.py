@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+Definition of the Profiler class
+a Profiler accumulates the time spent and the number of calls of :
+- each phase of the sweep or of the grid (timed by the engine itself, only when it is given a profiler)
+- the functions of the hot path, wrapped while the profiler is active
+nothing is wrapped nor timed without a profiler : profiling costs nothing when it is off.
+it can also run cProfile at the same time and dump its statistics (pstats file).
+"""
+
+import cProfile
+from os import makedirs
+from os.path import dirname
+from time import perf_counter
+import helpers
+import crossings_cache
+import grid
+from events import Events
+from living import Living
+from crossings_cache import CrossingsCache
+from geo.segment_store import SegmentStore
+from geo.coordinates_hash import CoordinatesHash
+
+
+def hot_functions(sweep_module):
+    """
+    functions of the hot path of the engines, as (owner, name) pairs.
+    sweep_module is the module running the sweep, which imported some helpers in its namespace.
+    find_crossing is wrapped in every namespace it is called from (the sweep, the helpers,
+    the crossings cache and the grid) : each of them holds its own reference
+    """
+    return [(sweep_module, 'find_new_event'), (sweep_module, 'find_crossing'), (helpers, 'find_crossing'), (sweep_module, 'living_key'),
+            (crossings_cache, 'find_crossing'), (grid, 'find_crossing'), (grid.Grid, 'cell'),
+            (SegmentStore, 'key_at'), (SegmentStore, 'intersection'), (CoordinatesHash, 'hash_coordinates'),
+            (CrossingsCache, 'crossing'), (Events, 'pop_event'), (Events, 'add_event'),
+            (Living, 'insert'), (Living, 'remove'), (Living, 'swap'), (Living, 'neighbours')]
+
+
+class Profiler():
+    """
+    Profiler Class
+    - functions = (owner, name) pairs of the functions to time while the profiler is active
+    - dump = if given, file where the statistics of cProfile are dumped
+    use it as a context manager :
+
+        with Profiler(functions) as profiler:
+            bentley_ottmann(adjuster, segments, profiler=profiler)
+        print(profiler.table())
+    """
+    def __init__(self, functions=(), dump=None):
+        self.functions = list(functions)
+        self.dump = dump
+        self.phases = {}                  # mapping of phases names to [seconds, calls]
+        self.originals = []               # wrapped functions, to put back
+        self.profile = cProfile.Profile() if dump is not None else None
+        self.start = None
+        self.elapsed = 0.0
+
+    def lap(self, phase, start):
+        """
+        adds the time since start to a phase, returns the current time
+        """
+        now = perf_counter()
+        record = self.phases.get(phase)
+        if record is None:
+            self.phases[phase] = [now - start, 1]
+        else:
+            record[0] += now - start
+            record[1] += 1
+        return now
+
+    def wrap(self, owner, name):
+        """
+        replaces a function (or method) by a timed version of it
+        """
+        function = vars(owner)[name]
+        phase = "{}.{}".format(owner.__name__, name) if isinstance(owner, type) else name
+        lap = self.lap
+
+        def timed(*arguments, **keywords):
+            start = perf_counter()
+            try:
+                return function(*arguments, **keywords)
+            finally:
+                lap(phase, start)
+
+        setattr(owner, name, timed)
+        self.originals.append((owner, name, function))
+
+    def __enter__(self):
+        for owner, name in self.functions:
+            self.wrap(owner, name)
+        if self.profile is not None:
+            self.profile.enable()
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exception):
+        self.elapsed += perf_counter() - self.start
+        if self.profile is not None:
+            self.profile.disable()
+            if dirname(self.dump):
+                makedirs(dirname(self.dump), exist_ok=True)
+            self.profile.dump_stats(self.dump)
+        for owner, name, function in reversed(self.originals):
+            setattr(owner, name, function)
+        self.originals = []
+
+    def table(self):
+        """
+        breakdown of the time spent, by phase, as a printable table.
+        times of functions include the functions they call
+        """
+        lines = ["   {:<36}{:>12}{:>12}{:>14}{:>8}".format("Phase", "Calls", "Total (s)", "Per call (us)", "%")]
+        for phase, (seconds, calls) in sorted(self.phases.items(), key=lambda item: -item[1][0]):
+            lines.append("   {:<36}{:>12}{:>12.4f}{:>14.3f}{:>8.1f}".format(
+                phase, calls, seconds, seconds / calls * 1e6, seconds / self.elapsed * 100 if self.elapsed else 0.0))
+        lines.append("   {:<36}{:>12}{:>12.4f}".format("total", "", self.elapsed))
+        return "\n".join(lines)
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+"""
+Definition of the Timeline class
+Timeline objects record the number of intersections processed against the time elapsed,
+using a bounded memory : when they are full, every other sample is dropped and
+the sampling step is doubled
+"""
+
+from time import time
+
+class Timeline():
+    """
+    Timeline Class
+    """
+    def __init__(self, capacity=1000):
+        self.start = time()
+        self.capacity = capacity          # maximum number of samples kept
+        self.step = 1                     # one record out of step is sampled
+        self.records = 0                  # number of records since the start
+        self.workers_memory = 0           # peak resident set sizes of the worker processes, summed (in bytes)
+        self.times = [0]                  # time elapsed at each sample
+        self.values = [0]                 # intersections processed at each sample
+
+    def record(self, value, records=1):
+        """
+        Records the number of intersections processed so far, in O(1) amortized
+        - records = number of records it stands for (events processed elsewhere, all at once)
+        """
+        self.records += records
+        if self.records // self.step == (self.records - records) // self.step:
+            return
+        self.times.append(time() - self.start)
+        self.values.append(value)
+        if len(self.times) >= self.capacity:
+            self.times = self.times[::2]
+            self.values = self.values[::2]
+            self.step *= 2
+
+    def close(self, value):
+        """
+        Records the last sample, whatever the sampling step
+        """
+        self.times.append(time() - self.start)
+        self.values.append(value)
+
+    def elapsed(self):
+        """
+        Time elapsed at the last sample
+        """
+        return self.times[-1]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+sampled verification of the crossings found by an engine, against brute force (see naive.py)
+on a part of the segments only :
+- 'strips'                      :   every pair of segments overlapping a few random horizontal strips
+                                    is intersected, the crossings inside the strips are compared
+- 'pairs'                       :   random pairs of segments are intersected (recall),
+                                    random crossings found are intersected again (precision).
+                                    few random pairs cross in a large scene : the recall is then
+                                    estimated on a handful of crossings
+intersections are snapped through the CoordinatesHash of the run : a crossing is confirmed
+if brute force finds the same pair of segments crossing at the same point, up to the snapping
+(a coordinate goes to the oldest one of its cell : snapped in another order, it can move by a step).
+recall and precision are estimated with their 95% confidence bounds (Wilson score intervals),
+if at least MINIMUM_CROSSINGS crossings were sampled.
+"""
+
+from math import sqrt
+import numpy as np
+from naive import pair_intersections, snapped_crossings, tiles, TILE_SIZE
+
+SAMPLES = {'pairs': 10000, 'strips': 8} # default number of pairs or of strips
+STRIP_SEGMENTS = 2000                    # segments overlapping a strip, when the strips can be that thin
+Z_95 = 1.959964                          # quantile of the normal law for 95% confidence bounds
+MINIMUM_CROSSINGS = 30                   # fewer crossings sampled give no estimate
+
+
+def same_point(point, other_point, tolerance):
+    """
+    are both points (tuples, or None) the same, up to tolerance on each coordinate ?
+    """
+    if point is None or other_point is None:
+        return False
+    return abs(point[0] - other_point[0]) <= tolerance and abs(point[1] - other_point[1]) <= tolerance
+
+
+def wilson_bounds(successes, trials, z=Z_95):
+    """
+    confidence bounds of a proportion estimated by successes out of trials (Wilson score interval)
+    """
+    if not trials:
+        return 0.0, 1.0
+    ratio = successes / trials
+    center = (ratio + z * z / (2 * trials)) / (1 + z * z / trials)
+    spread = z * sqrt(ratio * (1 - ratio) / trials + z * z / (4 * trials * trials)) / (1 + z * z / trials)
+    return max(0.0, center - spread), min(1.0, center + spread)
+
+
+class Reported():
+    """
+    Reported Class : the crossings found by the engine, searchable by pair of segments
+    - columns = segments a, segments b (a < b), x and y coordinates arrays (see Crossings.columns)
+    """
+    def __init__(self, columns):
+        self.segments_1, self.segments_2, self.x_coordinates, self.y_coordinates = columns
+        keys = np.asarray(self.segments_1, dtype=np.int64) << 32 | np.asarray(self.segments_2, dtype=np.int64)
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def point(self, segment_1, segment_2):
+        """
+        point where the engine found the two segments crossing, None if it did not
+        """
+        if segment_1 > segment_2:
+            segment_1, segment_2 = segment_2, segment_1
+        key = segment_1 << 32 | segment_2
+        position = int(np.searchsorted(self.keys, key))
+        if position == len(self.keys) or self.keys[position] != key:
+            return None
+        index = self.order[position]
+        return (float(self.x_coordinates[index]), float(self.y_coordinates[index]))
+
+
+def brute_force(adjuster, segments, indices_1, indices_2):
+    """
+    crossings of the pairs of segments indices_1[k], indices_2[k], snapped like the ones of naive :
+    mapping of pairs (smallest segment first) to points
+    """
+    crossings = {}
+    for segment_1, segment_2, point in snapped_crossings(adjuster, segments, *pair_intersections(segments, indices_1, indices_2)):
+        crossings[(min(segment_1, segment_2), max(segment_1, segment_2))] = point
+    return crossings
+
+
+def distinct_pairs(size, samples, rng):
+    """
+    samples distinct random pairs of segments out of size (all of them if there are fewer),
+    as arrays of segments a, segments b (a < b) : the pairs are numbered row by row
+    (pair k is (a, b) with b (b - 1) / 2 + a = k) and drawn without replacement
+    """
+    total = size * (size - 1) // 2
+    numbers = np.sort(rng.choice(total, min(samples, total), replace=False)).astype(np.int64)
+    indices_2 = ((np.sqrt(8 * numbers.astype(np.float64) + 1) + 1) // 2).astype(np.int64)
+    # the square root may be off by one for large numbers
+    indices_2 -= indices_2 * (indices_2 - 1) // 2 > numbers
+    indices_2 += (indices_2 + 1) * indices_2 // 2 <= numbers
+    return numbers - indices_2 * (indices_2 - 1) // 2, indices_2
+
+
+def verify_pairs(adjuster, segments, reported, samples, rng):
+    """
+    recall on samples random pairs of segments, precision on samples random crossings found
+    (both drawn without replacement).
+    returns (confirmed, expected) for both
+    """
+    indices_1, indices_2 = distinct_pairs(len(segments), samples, rng)
+    expected = brute_force(adjuster, segments, indices_1, indices_2)
+    tolerance = 2 / adjuster.scale
+    found = sum(same_point(reported.point(*pair), point, tolerance) for pair, point in expected.items())
+
+    picked = np.sort(rng.choice(len(reported), min(samples, len(reported)), replace=False))
+    indices_1 = np.asarray(reported.segments_1, dtype=np.int64)[picked]
+    indices_2 = np.asarray(reported.segments_2, dtype=np.int64)[picked]
+    points = zip(np.asarray(reported.x_coordinates)[picked].tolist(), np.asarray(reported.y_coordinates)[picked].tolist())
+    confirmed = brute_force(adjuster, segments, indices_1, indices_2)
+    correct = sum(same_point(confirmed.get(pair), point, tolerance) for pair, point in zip(zip(indices_1.tolist(), indices_2.tolist()), points))
+    return (found, len(expected)), (correct, len(picked))
+
+
+def strip_height(segments, bottom, height):
+    """
+    height of a strip starting at bottom overlapped by about STRIP_SEGMENTS segments
+    (or by twice the segments crossing its bottom line, if there are more of them)
+    """
+    crossing_bottom = np.count_nonzero((segments.y1 <= bottom) & (segments.y2 >= bottom))
+    wanted = max(STRIP_SEGMENTS, 2 * crossing_bottom)
+    low, high = 0.0, height
+    for _ in range(32):
+        middle = (low + high) / 2
+        if np.count_nonzero((segments.y1 <= bottom + middle) & (segments.y2 >= bottom)) > wanted:
+            high = middle
+        else:
+            low = middle
+    return low
+
+
+def verify_strips(adjuster, segments, reported, samples, rng):
+    """
+    recall and precision on samples random horizontal strips : every pair of segments overlapping
+    a strip is intersected. strips may overlap : the crossings are counted once, by pair.
+    returns (confirmed, expected) for both
+    """
+    y_min, y_max = float(segments.y1.min()), float(segments.y2.max())
+    reported_y = np.asarray(reported.y_coordinates, dtype=np.float64)
+    tolerance = 2 / adjuster.scale
+    found, correct = {}, {} # mappings of the expected and of the reported pairs checked to their confirmation
+    for _ in range(samples):
+        bottom = rng.uniform(y_min, y_max)
+        top = bottom + strip_height(segments, bottom, y_max - bottom)
+        overlapping = np.flatnonzero((segments.y1 <= top) & (segments.y2 >= bottom))
+        expected = {}
+        for block_1, block_2 in tiles(len(overlapping), TILE_SIZE):
+            indices_1, indices_2 = np.meshgrid(overlapping[block_1], overlapping[block_2], indexing='ij')
+            kept = indices_1 < indices_2
+            expected.update(brute_force(adjuster, segments, indices_1[kept], indices_2[kept]))
+        for pair, point in expected.items():
+            if bottom <= point[1] < top and pair not in found:
+                found[pair] = same_point(reported.point(*pair), point, tolerance)
+        for index in np.flatnonzero((reported_y >= bottom) & (reported_y < top)).tolist():
+            pair = (int(reported.segments_1[index]), int(reported.segments_2[index]))
+            if pair not in correct:
+                correct[pair] = same_point(expected.get(pair), (float(reported.x_coordinates[index]), float(reported_y[index])), tolerance)
+    return (sum(found.values()), len(found)), (sum(correct.values()), len(correct))
+
+
+def verify(adjuster, segments, columns, mode='strips', samples=None, seed=0):
+    """
+    checks the crossings found by an engine (columns segments a, segments b, x, y, see Crossings.stored_columns)
+    against brute force on a sample of the segments.
+    - mode = 'strips' or 'pairs' (see above)
+    - samples = number of strips or of pairs checked (SAMPLES by default)
+    returns a dict : confirmed and expected crossings, estimated recall and precision with their bounds
+    (the estimates are None if fewer than MINIMUM_CROSSINGS crossings were sampled)
+    """
+    samples = SAMPLES[mode] if samples is None else samples
+    rng = np.random.default_rng(seed)
+    reported = Reported(columns)
+    if len(segments) < 2:
+        recall, precision = (0, 0), (0, 0)
+    elif mode == 'pairs':
+        recall, precision = verify_pairs(adjuster, segments, reported, samples, rng)
+    else:
+        recall, precision = verify_strips(adjuster, segments, reported, samples, rng)
+    return {'mode': mode, 'samples': samples,
+            'recall': recall[0] / recall[1] if recall[1] >= MINIMUM_CROSSINGS else None, 'recall_bounds': wilson_bounds(*recall),
+            'found': recall[0], 'expected': recall[1],
+            'precision': precision[0] / precision[1] if precision[1] >= MINIMUM_CROSSINGS else None, 'precision_bounds': wilson_bounds(*precision),
+            'confirmed': precision[0], 'checked': precision[1]}
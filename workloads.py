@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+#pylint: disable=C0301
+
+"""
+deterministic generators of sets of segments, used to benchmark the engines.
+each generator takes the number of segments n (about n for tilings) and returns
+a (n, 4) array of x1, y1, x2, y2 coordinates. random generators take a seed.
+- uniform                       :   random segments in the unit square
+- triangle_h                    :   a triangle over a tiling of hexagons
+- triangle_b                    :   a triangle over a wall of bricks
+- lattice                       :   horizontal and vertical segments crossing on an integer lattice
+- near_parallel                 :   a bundle of almost parallel segments
+- pencil                        :   segments all crossing at a single point
+- small_integers                :   random segments with small integer coordinates (not in WORKLOADS : see benchmark.py --check)
+"""
+
+from math import ceil, sqrt
+import numpy as np
+from geo.segment import save_coordinates
+
+
+def uniform(n, seed=0, length=None):
+    """
+    segments with uniform random middles and directions in the unit square.
+    by default the length is 2/sqrt(n) : about n crossings.
+    """
+    rng = np.random.default_rng(seed)
+    if length is None:
+        length = 2 / sqrt(n)
+    middles = rng.random((n, 2))
+    angles = rng.random(n) * np.pi
+    half_directions = length / 2 * np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    return np.concatenate((middles - half_directions, middles + half_directions), axis=1)
+
+
+def triangle(size, density):
+    """
+    the three sides of a triangle over a square of given size,
+    covering a fraction density of its side.
+    """
+    vertices = (0.5 + (np.array([[0.1, 0.1], [0.9, 0.3], [0.5, 0.9]]) - 0.5) * density) * size
+    return np.concatenate((vertices, np.roll(vertices, -1, axis=0)), axis=1)
+
+
+def triangle_h(n, density=1.0):
+    """
+    a triangle over a tiling of about n/3 unit hexagons (about n segments).
+    density is the size of the triangle relative to the tiling.
+    """
+    # each hexagon adds three segments, the others are shared with its neighbours
+    columns = max(ceil(sqrt(n / 3)), 1)
+    height = sqrt(3)
+    hexagon = np.array([[1, 0], [1 / 2, height / 2], [-1 / 2, height / 2],
+                        [-1, 0], [-1 / 2, -height / 2], [1 / 2, -height / 2]])
+    column, row = [coordinates.ravel() for coordinates in np.meshgrid(np.arange(columns), np.arange(columns))]
+    centers = np.stack((1.5 * column, height * (row + column % 2 / 2)), axis=1)
+    # sides 0-1, 1-2 and 2-3 : the upper half of every hexagon
+    starts = (centers[:, None, :] + hexagon[None, :3, :]).reshape(-1, 2)
+    ends = (centers[:, None, :] + hexagon[None, 1:4, :]).reshape(-1, 2)
+    size = max(1.5 * columns, height * columns)
+    return np.concatenate((triangle(size, density), np.concatenate((starts, ends), axis=1)))
+
+
+def triangle_b(n, density=1.0):
+    """
+    a triangle over a wall of about n/2 bricks of width 1 (about n segments).
+    density is the size of the triangle relative to the wall.
+    """
+    # each brick adds an horizontal and a vertical segment
+    columns = max(ceil(sqrt(n / 2)), 1)
+    column, row = [coordinates.ravel() for coordinates in np.meshgrid(np.arange(columns), np.arange(columns))]
+    x_coordinates, y_coordinates = column + (row % 2) / 2, row / 2
+    horizontals = np.stack((x_coordinates, y_coordinates, x_coordinates + 1, y_coordinates), axis=1)
+    verticals = np.stack((x_coordinates, y_coordinates, x_coordinates, y_coordinates + 1 / 2), axis=1)
+    return np.concatenate((triangle(columns, density), horizontals, verticals))
+
+
+def lattice(n):
+    """
+    horizontal and vertical unit segments centered on an integer lattice :
+    each vertical segment crosses an horizontal one at a lattice point,
+    and horizontal (vertical) neighbours touch each other.
+    """
+    side = max(ceil(sqrt(n / 2)), 1)
+    columns, rows = [coordinates.ravel().astype(np.float64) for coordinates in np.meshgrid(np.arange(side), np.arange(side))]
+    horizontals = np.stack((columns - 0.5, rows, columns + 0.5, rows), axis=1)
+    verticals = np.stack((columns, rows - 0.5, columns, rows + 0.5), axis=1)
+    return np.concatenate((horizontals, verticals))
+
+
+def near_parallel(n, seed=0, spread=2.0):
+    """
+    segments across the unit square, almost parallel : they go from height i/n on the left
+    to height i/n + noise on the right, noise being about spread/n.
+    neighbours cross with tiny angles : about n crossings.
+    """
+    rng = np.random.default_rng(seed)
+    heights = np.arange(n) / n
+    noise = rng.normal(0, spread / n, n)
+    return np.stack((np.zeros(n), heights, np.ones(n), heights + noise), axis=1)
+
+
+def pencil(n, seed=0):
+    """
+    segments all going through the center of the unit square, which is never one of their endpoints.
+    """
+    rng = np.random.default_rng(seed)
+    angles = rng.random(n) * np.pi
+    directions = np.stack((np.cos(angles), np.sin(angles)), axis=1)
+    radii = 0.05 + 0.45 * rng.random((n, 2))
+    return np.concatenate((0.5 + directions * radii[:, :1], 0.5 - directions * radii[:, 1:]), axis=1)
+
+
+def small_integers(n, seed=0, size=8):
+    """
+    segments with random integer coordinates in [0, size) : endpoints often lie on other segments
+    (t-junctions, like in floor plans) or on other endpoints, and segments often overlap.
+    segments reduced to a point are dropped : there may be fewer than n.
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = rng.integers(0, size, (n, 4)).astype(np.float64)
+    return coordinates[(coordinates[:, 0] != coordinates[:, 2]) | (coordinates[:, 1] != coordinates[:, 3])]
+
+
+WORKLOADS = {'uniform': uniform, 'triangle_h': triangle_h, 'triangle_b': triangle_b,
+             'lattice': lattice, 'near_parallel': near_parallel, 'pencil': pencil}
+
+
+def generate(workload, n, filename):
+    """
+    writes the segments of a workload to a .bo file.
+    """
+    save_coordinates(filename, WORKLOADS[workload](n))